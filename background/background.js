@@ -446,6 +446,11 @@ class TranscriptionSession {
         }
         break;
 
+      case 'dropped':
+        // Host fell behind and discarded a stale queued chunk
+        console.warn('Transcription chunk dropped:', message.chunkId);
+        break;
+
       case 'heartbeat':
         // Heartbeat from native host - no action needed
         break;
@@ -647,7 +652,8 @@ class SubtitleGenerationSession {
       audio: audio,
       timestamp: timestamp || 0,
       chunkId: chunkId,
-      language: 'en'
+      language: 'en',
+      noDrop: true  // Every chunk is needed for the generated file; never dropped under backlog
     });
   }
 
@@ -684,6 +690,11 @@ class SubtitleGenerationSession {
         console.error('Generation error:', message.message);
         break;
 
+      case 'dropped':
+        // Generation chunks are sent with noDrop, so this shouldn't happen
+        console.warn('Generation chunk dropped:', message.chunkId);
+        break;
+
       case 'pong':
       case 'status':
       case 'transcribe_ack':
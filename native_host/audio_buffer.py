@@ -0,0 +1,70 @@
+"""
+Streaming Audio Buffer
+
+Preallocated float32 sample buffer for the streaming engines. Appends copy
+into free space at the end and reads are views, so a stream costs amortized
+O(1) per sample instead of re-concatenating the whole buffer on every chunk.
+"""
+
+import numpy as np
+
+
+class AudioBuffer:
+    """
+    FIFO of float32 samples in one preallocated array.
+
+    Live samples are _data[_head:_tail]. Consumed samples are dropped by
+    advancing _head; when an append would run past the end, the live region
+    is moved back to the start (and the array doubled if still too small).
+    Readers always get one contiguous view, which is what the models take.
+    """
+
+    def __init__(self, capacity: int = 16000 * 30):
+        """
+        Args:
+            capacity: Initial size in samples (grown on demand)
+        """
+        self._data = np.empty(capacity, dtype=np.float32)
+        self._head = 0
+        self._tail = 0
+
+    def __len__(self) -> int:
+        return self._tail - self._head
+
+    def append(self, samples: np.ndarray):
+        """Copy samples onto the end of the buffer."""
+        n = len(samples)
+        if self._tail + n > len(self._data):
+            self._make_room(n)
+        self._data[self._tail:self._tail + n] = samples
+        self._tail += n
+
+    def _make_room(self, n: int):
+        live = self._tail - self._head
+        if live + n > len(self._data):
+            grown = np.empty(max(2 * len(self._data), live + n), dtype=np.float32)
+            grown[:live] = self._data[self._head:self._tail]
+            self._data = grown
+        else:
+            self._data[:live] = self._data[self._head:self._tail]
+        self._head = 0
+        self._tail = live
+
+    def view(self) -> np.ndarray:
+        """All buffered samples; valid until the next append()/consume()."""
+        return self._data[self._head:self._tail]
+
+    def consume(self, n: int):
+        """Drop the oldest n samples."""
+        self._head = min(self._head + n, self._tail)
+        if self._head == self._tail:
+            self.clear()
+
+    def keep_last(self, n: int):
+        """Drop everything except the newest n samples."""
+        self._head = max(self._head, self._tail - n)
+
+    def clear(self):
+        """Drop all samples (keeps the allocation)."""
+        self._head = 0
+        self._tail = 0
@@ -5,38 +5,94 @@ Uses CTranslate2 for faster inference than OpenAI's Whisper.
 """
 
 import numpy as np
-import base64
+import binascii
+from operator import attrgetter
 from typing import Optional
 
+from pcm import pcm16_to_float32
+
+_segment_text = attrgetter('text')
+
 
 class FasterWhisperEngine:
     """Wrapper for faster-whisper model."""
 
-    def __init__(self, model_name: str = 'large-v3', device: str = 'cuda'):
+    # Whisper's fixed input window
+    WINDOW_SECONDS = 30
+
+    def __init__(
+        self,
+        model_name: str = 'distil-large-v3',
+        device: str = 'cuda',
+        compute_type: str = 'auto',
+        beam_size: int = 1,
+        vad_filter: bool = False,
+        silence_threshold: float = 1e-3
+    ):
         """
         Initialize the Faster-Whisper engine.
 
         Args:
-            model_name: Whisper model size ('tiny', 'base', 'small', 'medium', 'large-v3', 'distil-large-v3')
+            model_name: Whisper model size ('tiny', 'base', 'small', 'medium', 'large-v3', 'distil-large-v3').
+                Defaults to the distilled large-v3: same encoder, two decoder layers
+                instead of 32, several times faster at close to large-v3 WER.
+                CTranslate2's vocabulary shortlist (vmap) only applies to its
+                Translator models, not Whisper; greedy decoding (beam_size=1) on
+                the distilled decoder is the equivalent fast configuration here.
             device: Device to run on ('cuda' or 'cpu')
+            compute_type: CTranslate2 compute type. 'auto' picks the fastest type the
+                device supports. Recommended: 'int8_float16' on GPU (INT8 weights,
+                FP16 compute, ~half the VRAM of 'float16'), 'int8' on CPU.
+            beam_size: Decoder beam width. 1 (greedy) is adequate for streaming
+                subtitles; use 5 to trade latency for accuracy.
+            vad_filter: Run Silero VAD inside faster-whisper on every chunk. Off by
+                default; the silence gate below covers fully silent chunks.
+            silence_threshold: Peak amplitude below which a chunk is treated as
+                silence and skipped without calling the model (0 disables).
         """
         from faster_whisper import WhisperModel
 
         self.device = device
         self.model_name = model_name
         self.sample_rate = 16000
+        self.compute_type = compute_type
+        self.beam_size = beam_size
+        self.silence_threshold = silence_threshold
+
+        # Decoding options shared by every transcribe call. A single temperature
+        # disables the fallback loop that would otherwise re-run failed chunks
+        # with sampling, and not conditioning on previous text keeps the prompt
+        # from growing across chunks. Segment timestamps come from the decoded
+        # timestamp tokens; word timestamps (cross-attention alignment) stay off.
+        self._decode_options = {
+            'beam_size': beam_size,
+            'best_of': 1,
+            'temperature': 0.0,
+            'condition_on_previous_text': False,
+            'without_timestamps': False,
+            'word_timestamps': False,
+            'suppress_blank': True,
+            'suppress_tokens': [-1],
+        }
 
-        # Map device to compute_type
-        if device == 'cuda':
-            compute_type = 'float16'
-        else:
-            compute_type = 'int8'
+        self._vad_options = {'vad_filter': vad_filter}
+        if vad_filter:
+            self._vad_options['vad_parameters'] = {
+                'min_silence_duration_ms': 500,
+                'threshold': 0.5,
+            }
 
         # Load model
-        print(f"Loading Faster-Whisper model: {model_name} on {device}", flush=True)
+        print(f"Loading Faster-Whisper model: {model_name} on {device} ({compute_type})", flush=True)
         self.model = WhisperModel(model_name, device=device, compute_type=compute_type)
         print(f"Faster-Whisper model loaded", flush=True)
 
+        # WhisperModel builds its FeatureExtractor (mel filterbank, window) once
+        # and reuses it for every call, and CTranslate2's encoder always takes a
+        # padded 30s window, so chunks are already fixed-shape. Keep streamed
+        # chunks at or under WINDOW_SECONDS: a few seconds over costs a second
+        # full encoder pass on a mostly-padded window.
+
     def decode_audio(self, audio_base64: str) -> np.ndarray:
         """
         Decode base64 PCM16 audio to float32 numpy array.
@@ -47,10 +103,19 @@ class FasterWhisperEngine:
         Returns:
             Float32 numpy array normalized to [-1, 1]
         """
-        audio_bytes = base64.b64decode(audio_base64)
+        # a2b_base64 is the C decoder behind b64decode, minus the Python-level
+        # validation; frombuffer is a zero-copy view of the decoded bytes
+        audio_bytes = binascii.a2b_base64(audio_base64)
         audio_int16 = np.frombuffer(audio_bytes, dtype=np.int16)
-        audio_float32 = audio_int16.astype(np.float32) / 32768.0
-        return audio_float32
+        return pcm16_to_float32(audio_int16)
+
+    def _is_silent(self, audio: np.ndarray) -> bool:
+        """Cheap peak-amplitude gate so silent chunks never reach the model."""
+        if len(audio) == 0:
+            return True
+        if self.silence_threshold <= 0:
+            return False
+        return max(audio.max(), -audio.min()) < self.silence_threshold
 
     def transcribe_chunk(self, audio_base64: str, language: str = 'en') -> dict:
         """
@@ -63,21 +128,7 @@ class FasterWhisperEngine:
         Returns:
             Dict with 'text' and 'language' keys
         """
-        audio = self.decode_audio(audio_base64)
-
-        segments, info = self.model.transcribe(
-            audio,
-            language=None if language == 'auto' else language,
-            beam_size=5,
-            vad_filter=True
-        )
-
-        text = ' '.join(seg.text for seg in segments)
-
-        return {
-            'text': text.strip(),
-            'language': info.language
-        }
+        return self._transcribe_array(self.decode_audio(audio_base64), language, with_segments=False)
 
     def transcribe_with_segments(self, audio_base64: str, language: Optional[str] = 'en') -> dict:
         """
@@ -90,29 +141,66 @@ class FasterWhisperEngine:
         Returns:
             Dict with 'text', 'segments', and 'language' keys
         """
-        audio = self.decode_audio(audio_base64)
+        return self._transcribe_array(self.decode_audio(audio_base64), language)
+
+    def transcribe_array(self, audio: np.ndarray, language: Optional[str] = 'en') -> dict:
+        """
+        Transcribe already-decoded audio with segment-level timestamps.
+
+        Same result as transcribe_with_segments() for callers that hold float32
+        samples, without re-encoding them to base64 PCM16.
+
+        Args:
+            audio: Float32 audio at 16kHz
+            language: Language code, 'auto' for detection, or None
+
+        Returns:
+            Dict with 'text', 'segments', and 'language' keys
+        """
+        return self._transcribe_array(audio, language)
+
+    def _transcribe_array(self, audio: np.ndarray, language: Optional[str] = 'en', with_segments: bool = True) -> dict:
+        """
+        Shared transcription path behind the public transcribe methods.
+
+        Args:
+            audio: Float32 audio at 16kHz
+            language: Language code, 'auto' for detection, or None
+            with_segments: Build the per-segment list as well as the text
+
+        Returns:
+            Dict with 'text' and 'language' keys, plus 'segments' when
+            with_segments is set
+        """
+        if self._is_silent(audio):
+            result = {'text': '', 'language': None if language == 'auto' else language}
+            if with_segments:
+                result['segments'] = []
+            return result
 
         segments_gen, info = self.model.transcribe(
             audio,
             language=None if language == 'auto' else language,
-            beam_size=5,
-            vad_filter=True,
-            word_timestamps=False
+            **self._vad_options,
+            **self._decode_options
         )
 
-        # Collect segments
-        segments = []
-        full_text = []
-        for seg in segments_gen:
-            segments.append({
-                'start': seg.start,
-                'end': seg.end,
-                'text': seg.text.strip()
-            })
-            full_text.append(seg.text)
+        if not with_segments:
+            text = ' '.join(map(_segment_text, list(segments_gen)))
+            return {
+                'text': text.strip(),
+                'language': info.language
+            }
+
+        # Run decoding to completion once, then format
+        seg_list = list(segments_gen)
+        segments = [
+            {'start': seg.start, 'end': seg.end, 'text': seg.text.strip()}
+            for seg in seg_list
+        ]
 
         return {
-            'text': ' '.join(full_text).strip(),
+            'text': ' '.join(map(_segment_text, seg_list)).strip(),
             'segments': segments,
             'language': info.language
         }
@@ -133,7 +221,7 @@ class StreamingFasterWhisper:
         self.overlap_seconds = overlap_seconds
         self.sample_rate = 16000
         self.last_end_time = 0.0
-        self.last_text = ""  # Track last text to avoid duplicates
+        self._set_last_text("")  # Track last text to avoid duplicates
 
     def process_chunk(self, audio_base64: str, chunk_start_time: float, language: str = 'en') -> list:
         """
@@ -173,40 +261,39 @@ class StreamingFasterWhisper:
                         'text': seg_text
                     })
                     self.last_end_time = adjusted_end
-                    self.last_text = seg_text
+                    self._set_last_text(seg_text)
 
         return adjusted_segments
 
+    def _set_last_text(self, text: str):
+        """Remember the last emitted text plus the forms _is_duplicate compares against."""
+        self.last_text = text
+        self._last_lower = text.lower().strip()
+        last_words = self._last_lower.split()
+        self._last_word_count = len(last_words)
+        self._last_tail = tuple(last_words[-3:])
+
     def _is_duplicate(self, text: str) -> bool:
         """Check if text is a duplicate of recent text (from overlap)."""
         if not self.last_text:
             return False
 
-        # Check if the new text starts with the end of the last text
-        # or if the last text ends with the start of the new text
         text_lower = text.lower().strip()
-        last_lower = self.last_text.lower().strip()
 
         # If texts are very similar, it's likely a duplicate from overlap
-        if text_lower == last_lower:
+        if text_lower == self._last_lower:
             return True
 
-        # Check if there's significant overlap in the text content
-        # Split into words and check for overlap
-        text_words = text_lower.split()
-        last_words = last_lower.split()
-
-        if len(text_words) < 2 or len(last_words) < 2:
+        # Check if the first few words of new text match the last few words of
+        # previous (tail of the previous text is cached in _set_last_text)
+        text_words = text_lower.split(None, 3)[:3]
+        if len(text_words) < 2 or self._last_word_count < 2:
             return False
 
-        # Check if the first few words of new text match the last few words of previous
-        check_words = min(3, len(text_words), len(last_words))
-        if text_words[:check_words] == last_words[-check_words:]:
-            return True
-
-        return False
+        check_words = min(3, len(text_words), self._last_word_count)
+        return tuple(text_words[:check_words]) == self._last_tail[-check_words:]
 
     def reset(self):
         """Reset streaming state (e.g., on video seek)."""
         self.last_end_time = 0.0
-        self.last_text = ""
+        self._set_last_text("")
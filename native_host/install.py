@@ -9,6 +9,7 @@ It creates the necessary registry entries and updates the host manifest.
 import os
 import sys
 import json
+import hashlib
 import winreg
 import argparse
 from pathlib import Path
@@ -77,10 +78,19 @@ def create_firefox_host_manifest() -> dict:
     }
 
 
-def write_host_manifest(manifest: dict) -> Path:
-    """Write the Chrome/Edge host manifest to disk."""
-    script_dir = get_script_dir()
-    manifest_path = script_dir / 'manifest.json'
+def _manifest_digest(manifest: dict) -> str:
+    """Content hash of a manifest, independent of key order and formatting."""
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _write_manifest_if_changed(manifest: dict, manifest_path: Path) -> Path:
+    """Write a manifest unless an identical one is already on disk."""
+    try:
+        with open(manifest_path) as f:
+            if _manifest_digest(json.load(f)) == _manifest_digest(manifest):
+                return manifest_path
+    except (OSError, ValueError):
+        pass  # Missing or unreadable manifest: (re)write it
 
     with open(manifest_path, 'w') as f:
         json.dump(manifest, f, indent=2)
@@ -88,15 +98,30 @@ def write_host_manifest(manifest: dict) -> Path:
     return manifest_path
 
 
+def write_host_manifest(manifest: dict) -> Path:
+    """Write the Chrome/Edge host manifest to disk."""
+    return _write_manifest_if_changed(manifest, get_script_dir() / 'manifest.json')
+
+
 def write_firefox_host_manifest(manifest: dict) -> Path:
     """Write the Firefox host manifest to disk (separate file from Chrome's)."""
-    script_dir = get_script_dir()
-    manifest_path = script_dir / FIREFOX_MANIFEST_FILENAME
+    return _write_manifest_if_changed(manifest, get_script_dir() / FIREFOX_MANIFEST_FILENAME)
 
-    with open(manifest_path, 'w') as f:
-        json.dump(manifest, f, indent=2)
 
-    return manifest_path
+def _set_registry_default(key_path: str, value: str):
+    """Point a HKCU key's default value at `value`, creating the key if needed.
+
+    The value is written on the already-open key with SetValueEx (SetValue
+    opens the subkey again internally) and skipped when it is already set.
+    """
+    with winreg.CreateKeyEx(winreg.HKEY_CURRENT_USER, key_path, 0,
+                            winreg.KEY_QUERY_VALUE | winreg.KEY_SET_VALUE) as key:
+        try:
+            if winreg.QueryValueEx(key, '') == (value, winreg.REG_SZ):
+                return
+        except FileNotFoundError:
+            pass
+        winreg.SetValueEx(key, '', 0, winreg.REG_SZ, value)
 
 
 def register_chrome(manifest_path: Path) -> bool:
@@ -104,13 +129,9 @@ def register_chrome(manifest_path: Path) -> bool:
     try:
         key_path = f'Software\\Google\\Chrome\\NativeMessagingHosts\\{HOST_NAME}'
 
-        # Create or open the registry key
-        key = winreg.CreateKey(winreg.HKEY_CURRENT_USER, key_path)
-
         # Set the default value to the manifest path
-        winreg.SetValue(key, '', winreg.REG_SZ, str(manifest_path))
+        _set_registry_default(key_path, str(manifest_path))
 
-        winreg.CloseKey(key)
         print(f'Registered with Chrome: {key_path}')
         return True
 
@@ -124,13 +145,9 @@ def register_edge(manifest_path: Path) -> bool:
     try:
         key_path = f'Software\\Microsoft\\Edge\\NativeMessagingHosts\\{HOST_NAME}'
 
-        # Create or open the registry key
-        key = winreg.CreateKey(winreg.HKEY_CURRENT_USER, key_path)
-
         # Set the default value to the manifest path
-        winreg.SetValue(key, '', winreg.REG_SZ, str(manifest_path))
+        _set_registry_default(key_path, str(manifest_path))
 
-        winreg.CloseKey(key)
         print(f'Registered with Edge: {key_path}')
         return True
 
@@ -178,9 +195,7 @@ def register_firefox(manifest_path: Path) -> bool:
     """
     try:
         key_path = f'Software\\Mozilla\\NativeMessagingHosts\\{HOST_NAME}'
-        key = winreg.CreateKey(winreg.HKEY_CURRENT_USER, key_path)
-        winreg.SetValue(key, '', winreg.REG_SZ, str(manifest_path))
-        winreg.CloseKey(key)
+        _set_registry_default(key_path, str(manifest_path))
         print(f'Registered with Firefox: {key_path}')
         return True
     except Exception as e:
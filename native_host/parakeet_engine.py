@@ -4,13 +4,15 @@ NVIDIA Parakeet TDT Speech-to-Text Engine
 Faster and more accurate than Whisper, designed for streaming/real-time use.
 """
 
+import contextlib
+import threading
 import numpy as np
-import base64
-import tempfile
-import os
-import wave
+import binascii
+import torch
 from typing import Optional
 
+from pcm import pcm16_to_float32
+
 # NeMo imports (lazy loaded)
 nemo_asr = None
 asr_model = None
@@ -19,13 +21,24 @@ asr_model = None
 class ParakeetEngine:
     """Wrapper for NVIDIA Parakeet TDT model."""
 
-    def __init__(self, model_name: str = 'nvidia/parakeet-tdt-0.6b-v3', device: str = 'cuda'):
+    # Initial size of the pinned upload buffers (30s at 16kHz); grown on demand
+    MAX_CHUNK_SAMPLES = 480000
+
+    def __init__(
+        self,
+        model_name: str = 'nvidia/parakeet-tdt-0.6b-v3',
+        device: str = 'cuda',
+        precision: str = 'auto'
+    ):
         """
         Initialize the Parakeet engine.
 
         Args:
             model_name: Parakeet model to use
             device: Device to run on ('cuda' or 'cpu')
+            precision: 'fp32', 'fp16', 'bf16' (CUDA) or 'int8' (CPU dynamic
+                quantization). 'auto' picks bf16 on Ampere+, fp16 on older
+                GPUs and int8 on CPU.
         """
         global nemo_asr, asr_model
 
@@ -33,6 +46,13 @@ class ParakeetEngine:
         self.model_name = model_name
         self.sample_rate = 16000
 
+        # The staging/upload buffers below are shared by every call, and the
+        # model reads a view of the device buffer; the transcription worker,
+        # and the streaming worker can both call into the same engine, so
+        # each transcription holds this from staging until its model call
+        # is done
+        self._lock = threading.RLock()
+
         # Import NeMo
         import nemo.collections.asr as nemo_asr_module
         nemo_asr = nemo_asr_module
@@ -45,11 +65,66 @@ class ParakeetEngine:
         if device == 'cuda':
             asr_model = asr_model.cuda()
 
-        # Set to eval mode
+        # Set to eval mode and drop autograd bookkeeping for the weights
         asr_model.eval()
+        for param in asr_model.parameters():
+            param.requires_grad_(False)
+
+        # Streaming chunks have a fixed shape, so let cuDNN pick kernels once
+        if device == 'cuda':
+            torch.backends.cudnn.benchmark = True
+
+        if precision == 'auto':
+            if device == 'cuda':
+                precision = 'bf16' if torch.cuda.get_device_capability()[0] >= 8 else 'fp16'
+            else:
+                precision = 'int8'
+
+        # Half-precision weights run the encoder on tensor cores at half the
+        # VRAM. The preprocessor (STFT/log-mel) stays fp32 for accuracy and
+        # autocast bridges its output into the half-precision encoder.
+        self._half_dtype = None
+        if device == 'cuda' and precision in ('fp16', 'bf16'):
+            self._half_dtype = torch.bfloat16 if precision == 'bf16' else torch.float16
+            asr_model = asr_model.to(dtype=self._half_dtype)
+            if hasattr(asr_model, 'preprocessor'):
+                asr_model.preprocessor.float()
+        elif device != 'cuda' and precision == 'int8':
+            try:
+                asr_model = torch.quantization.quantize_dynamic(
+                    asr_model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            except Exception as e:
+                print(f"INT8 quantization failed, using fp32: {e}", flush=True)
+                precision = 'fp32'
+        else:
+            precision = 'fp32'
+        self.precision = precision
 
         self.model = asr_model
-        print(f"Parakeet model loaded on {device}", flush=True)
+
+        # Pinned host staging buffer + device buffer for audio uploads. Chunks
+        # are decoded straight into page-locked memory and copied on a side
+        # stream, so the H2D copy runs at full bandwidth without a pageable
+        # bounce buffer.
+        if device == 'cuda':
+            self._copy_stream = torch.cuda.Stream()
+            self._copy_done = None
+            self._alloc_upload_buffers(self.MAX_CHUNK_SAMPLES)
+
+        print(f"Parakeet model loaded on {device} ({self.precision})", flush=True)
+
+    def _alloc_upload_buffers(self, num_samples: int):
+        """(Re)allocate the pinned host and device upload buffers."""
+        self._pinned = torch.empty(num_samples, dtype=torch.float32, pin_memory=True)
+        self._pinned_np = self._pinned.numpy()
+        self._gpu = torch.empty(num_samples, dtype=torch.float32, device='cuda')
+
+    def _autocast(self):
+        """Autocast context for model calls when running half-precision weights."""
+        if self._half_dtype is None:
+            return contextlib.nullcontext()
+        return torch.autocast('cuda', dtype=self._half_dtype)
 
     def decode_audio(self, audio_base64: str) -> np.ndarray:
         """
@@ -61,10 +136,59 @@ class ParakeetEngine:
         Returns:
             Float32 numpy array normalized to [-1, 1]
         """
-        audio_bytes = base64.b64decode(audio_base64)
+        # a2b_base64 is the C decoder behind b64decode, minus the Python-level
+        # validation; frombuffer is a zero-copy view of the decoded bytes
+        audio_bytes = binascii.a2b_base64(audio_base64)
         audio_int16 = np.frombuffer(audio_bytes, dtype=np.int16)
-        audio_float32 = audio_int16.astype(np.float32) / 32768.0
-        return audio_float32
+        return pcm16_to_float32(audio_int16)
+
+    def _prepare_input(self, audio):
+        """
+        Turn base64 PCM16 audio or an already-decoded float32 array into the
+        form handed to the model.
+
+        On CUDA the samples are written into the pinned staging buffer and
+        uploaded asynchronously; the returned tensor is a view of the device
+        buffer that stays valid until the next call. On CPU this is just the
+        decoded numpy array.
+        """
+        if isinstance(audio, np.ndarray):
+            if self.device != 'cuda':
+                return audio
+            n = len(audio)
+            np.copyto(self._stage(n), audio)
+            return self._upload(n)
+
+        if self.device != 'cuda':
+            return self.decode_audio(audio)
+
+        audio_int16 = np.frombuffer(binascii.a2b_base64(audio), dtype=np.int16)
+        n = len(audio_int16)
+        pcm16_to_float32(audio_int16, out=self._stage(n))
+        return self._upload(n)
+
+    def _stage(self, n: int) -> np.ndarray:
+        """Return the first n samples of the pinned staging buffer, ready for writing."""
+        # Don't overwrite the staging buffer while the previous copy is in flight
+        if self._copy_done is not None:
+            self._copy_done.synchronize()
+        if n > len(self._pinned_np):
+            self._alloc_upload_buffers(n)
+        return self._pinned_np[:n]
+
+    def _upload(self, n: int) -> torch.Tensor:
+        """Copy the first n staged samples to the device on the copy stream."""
+        with torch.cuda.stream(self._copy_stream):
+            # Work already queued on the default stream may still be reading
+            # the device buffer (e.g. the previous chunk's model call)
+            self._copy_stream.wait_stream(torch.cuda.current_stream())
+            self._gpu[:n].copy_(self._pinned[:n], non_blocking=True)
+            self._copy_done = torch.cuda.Event()
+            self._copy_done.record(self._copy_stream)
+
+        # Compute on the default stream must see the finished upload
+        torch.cuda.current_stream().wait_stream(self._copy_stream)
+        return self._gpu[:n]
 
     def transcribe_chunk(self, audio_base64: str, language: str = 'en') -> dict:
         """
@@ -77,30 +201,7 @@ class ParakeetEngine:
         Returns:
             Dict with 'text' and 'language' keys
         """
-        audio = self.decode_audio(audio_base64)
-
-        # Parakeet needs audio as a file, so write to temp file
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as f:
-            temp_path = f.name
-            # Write WAV file
-            with wave.open(f, 'wb') as wav:
-                wav.setnchannels(1)
-                wav.setsampwidth(2)  # 16-bit
-                wav.setframerate(self.sample_rate)
-                wav.writeframes((audio * 32767).astype(np.int16).tobytes())
-
-        try:
-            # Transcribe
-            output = self.model.transcribe([temp_path])
-            text = output[0].text if hasattr(output[0], 'text') else str(output[0])
-
-            return {
-                'text': text.strip(),
-                'language': 'auto'  # Parakeet auto-detects
-            }
-        finally:
-            # Clean up temp file
-            os.unlink(temp_path)
+        return self._transcribe_array(audio_base64, language, with_segments=False)
 
     def transcribe_with_segments(self, audio_base64: str, language: Optional[str] = 'en') -> dict:
         """
@@ -113,77 +214,115 @@ class ParakeetEngine:
         Returns:
             Dict with 'text', 'segments', and 'language' keys
         """
-        audio = self.decode_audio(audio_base64)
-
-        # Write to temp file
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as f:
-            temp_path = f.name
-            with wave.open(f, 'wb') as wav:
-                wav.setnchannels(1)
-                wav.setsampwidth(2)
-                wav.setframerate(self.sample_rate)
-                wav.writeframes((audio * 32767).astype(np.int16).tobytes())
-
-        try:
-            # Transcribe with timestamps
-            output = self.model.transcribe([temp_path], timestamps=True)
-
-            result = output[0]
-            text = result.text if hasattr(result, 'text') else str(result)
-
-            # Extract segments from timestamps
-            segments = []
-            if hasattr(result, 'timestamp') and result.timestamp:
-                # Use word-level timestamps grouped into segments
-                if 'segment' in result.timestamp:
-                    for seg in result.timestamp['segment']:
-                        segments.append({
-                            'start': seg['start'],
-                            'end': seg['end'],
-                            'text': seg['segment'].strip()
-                        })
-                elif 'word' in result.timestamp:
-                    # Fall back to word timestamps, group into ~5 second segments
-                    words = result.timestamp['word']
-                    if words:
-                        current_segment = {'start': words[0]['start'], 'words': [], 'end': 0}
-                        for word in words:
-                            current_segment['words'].append(word['word'])
-                            current_segment['end'] = word['end']
-                            # Start new segment every ~5 seconds
-                            if word['end'] - current_segment['start'] >= 5.0:
-                                segments.append({
-                                    'start': current_segment['start'],
-                                    'end': current_segment['end'],
-                                    'text': ' '.join(current_segment['words']).strip()
-                                })
-                                if words.index(word) < len(words) - 1:
-                                    next_word = words[words.index(word) + 1]
-                                    current_segment = {'start': next_word['start'], 'words': [], 'end': 0}
-                        # Add remaining words
-                        if current_segment['words']:
+        return self._transcribe_array(audio_base64, language)
+
+    def transcribe_array(self, audio: np.ndarray, language: Optional[str] = 'en') -> dict:
+        """
+        Transcribe already-decoded audio with segment-level timestamps.
+
+        Same result as transcribe_with_segments() for callers that hold float32
+        samples, without re-encoding them to base64 PCM16.
+
+        Args:
+            audio: Float32 audio at 16kHz
+            language: Language code (ignored - Parakeet auto-detects)
+
+        Returns:
+            Dict with 'text', 'segments', and 'language' keys
+        """
+        return self._transcribe_array(audio, language)
+
+    def _transcribe_array(self, audio, language: Optional[str] = None, with_segments: bool = True) -> dict:
+        """
+        Shared transcription path behind the public transcribe methods.
+
+        Accepts either an already-decoded float32 array (the streaming
+        wrappers hold decoded audio) or a base64 PCM16 string, runs the
+        staged upload and one model call under inference mode/autocast.
+
+        Args:
+            audio: Float32 array at 16kHz or base64-encoded PCM16
+            language: Language code (ignored - Parakeet auto-detects)
+            with_segments: Request timestamps and build the segment list
+
+        Returns:
+            Dict with 'text' and 'language' keys, plus 'segments' when
+            with_segments is set
+        """
+        with self._lock:
+            audio = self._prepare_input(audio)
+
+            # NeMo accepts in-memory float32 arrays/tensors at the model sample rate
+            with torch.inference_mode(), self._autocast():
+                output = self.model.transcribe([audio], timestamps=with_segments)
+
+        if with_segments:
+            return self._format_result(output[0], len(audio))
+
+        text = output[0].text if hasattr(output[0], 'text') else str(output[0])
+        return {
+            'text': text.strip(),
+            'language': 'auto'  # Parakeet auto-detects
+        }
+
+    def _format_result(self, result, num_samples: int) -> dict:
+        """Convert a NeMo hypothesis into the engine's text/segments dict."""
+        text = result.text if hasattr(result, 'text') else str(result)
+
+        # Extract segments from timestamps
+        segments = []
+        if hasattr(result, 'timestamp') and result.timestamp:
+            # Use word-level timestamps grouped into segments
+            if 'segment' in result.timestamp:
+                for seg in result.timestamp['segment']:
+                    segments.append({
+                        'start': seg['start'],
+                        'end': seg['end'],
+                        'text': seg['segment'].strip()
+                    })
+            elif 'word' in result.timestamp:
+                # Fall back to word timestamps, group into ~5 second segments
+                words = result.timestamp['word']
+                if words:
+                    last_index = len(words) - 1
+                    seg_start = words[0]['start']
+                    seg_end = 0
+                    seg_words = []
+                    for i, word in enumerate(words):
+                        seg_words.append(word['word'])
+                        seg_end = word['end']
+                        # Start new segment every ~5 seconds
+                        if seg_end - seg_start >= 5.0:
                             segments.append({
-                                'start': current_segment['start'],
-                                'end': current_segment['end'],
-                                'text': ' '.join(current_segment['words']).strip()
+                                'start': seg_start,
+                                'end': seg_end,
+                                'text': ' '.join(seg_words).strip()
                             })
+                            seg_words = []
+                            if i < last_index:
+                                seg_start = words[i + 1]['start']
+                    # Add remaining words
+                    if seg_words:
+                        segments.append({
+                            'start': seg_start,
+                            'end': seg_end,
+                            'text': ' '.join(seg_words).strip()
+                        })
 
-            # If no segments extracted, create one from full text
-            if not segments and text.strip():
-                duration = len(audio) / self.sample_rate
-                segments.append({
-                    'start': 0,
-                    'end': duration,
-                    'text': text.strip()
-                })
+        # If no segments extracted, create one from full text
+        if not segments and text.strip():
+            duration = num_samples / self.sample_rate
+            segments.append({
+                'start': 0,
+                'end': duration,
+                'text': text.strip()
+            })
 
-            return {
-                'text': text.strip(),
-                'segments': segments,
-                'language': 'auto'
-            }
-        finally:
-            os.unlink(temp_path)
+        return {
+            'text': text.strip(),
+            'segments': segments,
+            'language': 'auto'
+        }
 
 
 class StreamingParakeet:
@@ -200,9 +339,15 @@ class StreamingParakeet:
         self.engine = engine
         self.overlap_seconds = overlap_seconds
         self.sample_rate = 16000
-        self.pending_audio = np.array([], dtype=np.float32)
+        self._overlap_samples = int(self.sample_rate * overlap_seconds)
         self.last_end_time = 0.0
 
+        # Reusable overlap+chunk buffer: the previous chunk's tail lives in
+        # _ring[:_tail_len] and each new chunk is copied in right after it,
+        # so steady-state chunks need no concatenation
+        self._ring = np.empty(0, dtype=np.float32)
+        self._tail_len = 0
+
     def process_chunk(self, audio_base64: str, chunk_start_time: float, language: str = 'en') -> list:
         """
         Process an audio chunk with overlap handling.
@@ -218,29 +363,27 @@ class StreamingParakeet:
         # Decode new audio
         new_audio = self.engine.decode_audio(audio_base64)
 
-        # Calculate overlap samples
-        overlap_samples = int(self.sample_rate * self.overlap_seconds)
+        tail_len = self._tail_len
+        total = tail_len + len(new_audio)
 
-        # Combine with pending audio (keep overlap from previous chunk)
-        if len(self.pending_audio) > 0:
-            combined_audio = np.concatenate([
-                self.pending_audio[-overlap_samples:] if len(self.pending_audio) >= overlap_samples else self.pending_audio,
-                new_audio
-            ])
-            effective_start_time = chunk_start_time - self.overlap_seconds
-        else:
-            combined_audio = new_audio
-            effective_start_time = chunk_start_time
+        # Grow the buffer if this chunk is longer than any seen so far
+        if total > len(self._ring):
+            grown = np.empty(total, dtype=np.float32)
+            grown[:tail_len] = self._ring[:tail_len]
+            self._ring = grown
 
-        # Store for next chunk's overlap
-        self.pending_audio = new_audio
+        # Combine with the overlap kept from the previous chunk
+        self._ring[tail_len:total] = new_audio
+        combined_audio = self._ring[:total]
+        effective_start_time = chunk_start_time - tail_len / self.sample_rate
 
-        # Encode combined audio
-        audio_int16 = (combined_audio * 32767).astype(np.int16)
-        audio_base64_combined = base64.b64encode(audio_int16.tobytes()).decode('utf-8')
+        # Transcribe the decoded audio directly (no int16/base64 re-encode)
+        result = self.engine._transcribe_array(combined_audio, language)
 
-        # Transcribe
-        result = self.engine.transcribe_with_segments(audio_base64_combined, language)
+        # Keep this chunk's tail as the next chunk's overlap
+        keep = min(len(new_audio), self._overlap_samples)
+        self._ring[:keep] = new_audio[len(new_audio) - keep:]
+        self._tail_len = keep
 
         # Adjust segment timestamps to video time
         adjusted_segments = []
@@ -261,5 +404,5 @@ class StreamingParakeet:
 
     def reset(self):
         """Reset streaming state (e.g., on video seek)."""
-        self.pending_audio = np.array([], dtype=np.float32)
+        self._tail_len = 0
         self.last_end_time = 0.0
@@ -6,11 +6,192 @@ Designed to run alongside Faster-Whisper transcription.
 """
 
 import base64
+import binascii
+import math
 import struct
 import numpy as np
-from typing import List, Dict, Optional, Tuple
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple, Union
 import sys
 
+from pcm import pcm16_to_float32
+
+
+# Below this many bits per fingerprint the per-offset sweep beats an FFT
+_FFT_MIN_BITS = 1024
+
+try:
+    from scipy.signal import firwin, resample_poly
+except ImportError:
+    resample_poly = None  # Fall back to linear interpolation
+
+# PANNs model input rate
+PANNS_SAMPLE_RATE = 32000
+
+
+@lru_cache(maxsize=None)
+def _resample_filter(up: int, down: int) -> np.ndarray:
+    """Anti-aliasing FIR for resample_poly, designed once per rate pair."""
+    # Same design resample_poly uses by default (Kaiser beta 5, 10 taps per phase)
+    max_rate = max(up, down)
+    return firwin(2 * 10 * max_rate + 1, 1.0 / max_rate, window=('kaiser', 5.0))
+
+
+def _resample(audio: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Resample float32 audio between integer sample rates."""
+    if resample_poly is None:
+        # Simple resampling via interpolation
+        target_length = int(len(audio) * dst_rate / src_rate)
+        return np.interp(
+            np.linspace(0, len(audio), target_length),
+            np.arange(len(audio)),
+            audio
+        ).astype(np.float32)
+
+    g = math.gcd(src_rate, dst_rate)
+    up, down = dst_rate // g, src_rate // g
+    out = resample_poly(audio, up, down, window=_resample_filter(up, down))
+    return out.astype(np.float32, copy=False)
+
+
+# Fingerprints of at least this many frames use the Numba sweep when available
+_NUMBA_MIN_FRAMES = 64
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+if njit is not None:
+    _M1 = np.uint64(0x55555555)
+    _M2 = np.uint64(0x33333333)
+    _M4 = np.uint64(0x0F0F0F0F)
+    _H01 = np.uint64(0x01010101)
+    _LOW32 = np.uint64(0xFFFFFFFF)
+
+    # Words scored up front to rank offsets, and between pruning checks
+    _PRUNE_BLOCK_WORDS = 32
+
+    @njit(fastmath=True, cache=True)
+    def _xor_popcount(fp1, fp2, offset, start, stop):
+        """Differing bits between fp1[start:stop] and fp2[start+offset:stop+offset]."""
+        diff_bits = np.uint64(0)
+        for i in range(start, stop):
+            # SWAR popcount of the 32-bit XOR
+            x = np.uint64(fp1[i] ^ fp2[i + offset])
+            x = x - ((x >> np.uint64(1)) & _M1)
+            x = (x & _M2) + ((x >> np.uint64(2)) & _M2)
+            x = (x + (x >> np.uint64(4))) & _M4
+            diff_bits += ((x * _H01) & _LOW32) >> np.uint64(24)
+        return np.int64(diff_bits)
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _match_fp_numba(fp1, fp2, max_offset):
+        """
+        Branch-and-bound offset sweep over uint32 fingerprints.
+
+        Every offset's first block is scored in parallel to rank them; the
+        offsets are then scanned best-first, and each one is abandoned as soon
+        as its running differing-bit count proves it can't beat the best so
+        far. Counts only grow, so the result is the same as a full sweep.
+
+        Returns (best index into -max_offset..max_offset, differing bits,
+        overlap bits), with index -1 when nothing overlaps.
+        """
+        len1 = fp1.shape[0]
+        len2 = fp2.shape[0]
+        n_offsets = 2 * max_offset + 1
+        starts = np.zeros(n_offsets, dtype=np.int64)
+        ends = np.zeros(n_offsets, dtype=np.int64)
+        prefix = np.full(n_offsets, 2.0)  # > any real ratio: no overlap sorts last
+
+        for k in prange(n_offsets):
+            offset = k - max_offset
+            start = max(0, -offset)
+            end = min(len1, len2 - offset)
+            starts[k] = start
+            ends[k] = end
+            if end > start:
+                stop = min(end, start + _PRUNE_BLOCK_WORDS)
+                prefix[k] = _xor_popcount(fp1, fp2, offset, start, stop) / ((stop - start) * 32)
+
+        best_k = -1
+        best_diff = 0
+        best_total = 1
+        for k in np.argsort(prefix, kind='mergesort'):
+            start = starts[k]
+            end = ends[k]
+            if end <= start:
+                break
+            offset = k - max_offset
+            total_bits = (end - start) * 32
+
+            diff_bits = 0
+            pruned = False
+            i = start
+            while i < end:
+                stop = min(end, i + _PRUNE_BLOCK_WORDS)
+                diff_bits += _xor_popcount(fp1, fp2, offset, i, stop)
+                i = stop
+                # diff/total > best_diff/best_total, compared exactly in integers
+                if best_k >= 0 and diff_bits * best_total > best_diff * total_bits:
+                    pruned = True
+                    break
+            if pruned:
+                continue
+
+            # Ties go to the lowest offset, as in the direct sweep
+            lhs = diff_bits * best_total
+            rhs = best_diff * total_bits
+            if best_k < 0 or lhs < rhs or (lhs == rhs and k < best_k):
+                best_k = k
+                best_diff = diff_bits
+                best_total = total_bits
+
+        return best_k, best_diff, best_total
+
+    @njit(fastmath=True, cache=True)
+    def _cosine_numba(a, b):
+        """Cosine similarity with the dot product and both norms in one loop."""
+        dot = 0.0
+        sq_a = 0.0
+        sq_b = 0.0
+        for i in range(a.shape[0]):
+            dot += a[i] * b[i]
+            sq_a += a[i] * a[i]
+            sq_b += b[i] * b[i]
+        if sq_a == 0.0 or sq_b == 0.0:
+            return 0.0
+        return dot / np.sqrt(sq_a * sq_b)
+
+
+if hasattr(np, 'bitwise_count'):
+    def _count_bits(words: np.ndarray) -> int:
+        """Total number of set bits in an int32/uint32 array (NumPy >= 2.0)."""
+        return int(np.bitwise_count(words.view(np.uint32)).sum())
+else:
+    def _count_bits(words: np.ndarray) -> int:
+        """Total number of set bits in an int32/uint32 array."""
+        return int(np.unpackbits(np.ascontiguousarray(words).view(np.uint8)).sum())
+
+
+def embedding_codes(stored) -> Optional[np.ndarray]:
+    """
+    int8 codes of a stored quantized embedding, or None for a float embedding.
+
+    Accepts base64 strings (current format), raw bytes, and int lists
+    (older patterns).
+    """
+    if isinstance(stored, str):
+        return np.frombuffer(binascii.a2b_base64(stored), dtype=np.int8)
+    if isinstance(stored, (bytes, bytearray, memoryview)):
+        return np.frombuffer(stored, dtype=np.int8)
+    if isinstance(stored, np.ndarray):
+        return stored.astype(np.int8, copy=False) if stored.dtype.kind in 'iu' else None
+    if len(stored) and isinstance(stored[0], int):
+        return np.asarray(stored, dtype=np.int8)
+    return None
+
 
 class PatternEngine:
     """
@@ -23,6 +204,7 @@ class PatternEngine:
         self._chromaprint = None
         self._panns_model = None
         self._panns_loaded = False
+        self._panns_autocast_dtype = None  # Set by _load_panns() on bf16-capable GPUs
 
     def _load_chromaprint(self):
         """Lazy load Chromaprint for exact fingerprinting."""
@@ -51,6 +233,12 @@ class PatternEngine:
                 device=self.device
             )
             self._panns_loaded = True
+
+            # Reduced-precision inference on Ampere+. bf16 only: the STFT
+            # power spectrum in the front end overflows fp16 on loud audio.
+            import torch
+            if self.device == 'cuda' and torch.cuda.is_available() and torch.cuda.get_device_capability()[0] >= 8:
+                self._panns_autocast_dtype = torch.bfloat16
             print(f"[Pattern] PANNs loaded on {self.device}", file=sys.stderr)
         except ImportError as e:
             print(f"[Pattern] PANNs not available: {e}", file=sys.stderr)
@@ -67,10 +255,9 @@ class PatternEngine:
         Input: base64 encoded PCM16 at 16kHz
         Output: float32 array in range [-1, 1]
         """
-        audio_bytes = base64.b64decode(audio_base64)
+        audio_bytes = binascii.a2b_base64(audio_base64)
         pcm16 = np.frombuffer(audio_bytes, dtype=np.int16)
-        audio_float = pcm16.astype(np.float32) / 32768.0
-        return audio_float
+        return pcm16_to_float32(pcm16)
 
     def fingerprint(self, audio: np.ndarray, sample_rate: int = 16000) -> Optional[List[int]]:
         """
@@ -94,21 +281,18 @@ class PatternEngine:
 
             # Generate fingerprint
             # chromaprint expects raw bytes
-            fp_raw = self._chromaprint.decode_fingerprint(
-                self._chromaprint.encode_fingerprint(
-                    self._chromaprint.calc_fingerprint(
-                        audio_int16.tobytes(),
-                        sample_rate,
-                        1  # mono
-                    ),
-                    1  # algorithm version
-                ),
-                1
+            fp_raw = self._chromaprint.calc_fingerprint(
+                audio_int16.tobytes(),
+                sample_rate,
+                1  # mono
             )
 
-            if fp_raw:
-                return list(fp_raw[0])
-            return None
+            if not fp_raw:
+                return None
+            if isinstance(fp_raw, (bytes, bytearray, memoryview)):
+                # Packed little-endian uint32 frames
+                return np.frombuffer(fp_raw, dtype='<u4').astype(np.int32).tolist()
+            return list(fp_raw)
 
         except Exception as e:
             print(f"[Pattern] Fingerprint error: {e}", file=sys.stderr)
@@ -151,63 +335,136 @@ class PatternEngine:
         Returns:
             2048-dim float32 embedding array, or None if unavailable
         """
+        embeddings = self.embed_batch([audio], sample_rate)
+        if embeddings is None:
+            return None
+
+        # Return first (and only) embedding
+        return embeddings[0]
+
+    def embed_batch(self, audios: List[np.ndarray], sample_rate: int = 16000) -> Optional[np.ndarray]:
+        """
+        Generate PANNs embeddings for several clips in one forward pass.
+
+        Clips are zero-padded to the longest one. PANNs pools over time, so
+        padding slightly shifts the embedding of a shorter clip; batch clips
+        of equal length (e.g. consecutive chunks) for results identical to
+        embed().
+
+        Args:
+            audios: Float32 audio arrays at the same sample rate
+            sample_rate: Input sample rate
+
+        Returns:
+            (N, 2048) float32 embedding array, or None if unavailable
+        """
         self._load_panns()
 
-        if self._panns_model is None:
+        if self._panns_model is None or not audios:
             return None
 
         try:
             # PANNs expects 32kHz audio
-            if sample_rate != 32000:
-                # Simple resampling via interpolation
-                target_length = int(len(audio) * 32000 / sample_rate)
-                audio_32k = np.interp(
-                    np.linspace(0, len(audio), target_length),
-                    np.arange(len(audio)),
-                    audio
-                ).astype(np.float32)
+            if sample_rate != PANNS_SAMPLE_RATE:
+                # Polyphase FIR (16k -> 32k is a plain 2x upsample)
+                clips = [_resample(audio, sample_rate, PANNS_SAMPLE_RATE) for audio in audios]
             else:
-                audio_32k = audio
+                clips = audios
 
             # PANNs expects (batch, samples) shape
-            audio_batch = audio_32k[np.newaxis, :]
+            if len(clips) == 1:
+                audio_batch = np.asarray(clips[0], dtype=np.float32)[np.newaxis, :]
+            else:
+                audio_batch = np.zeros((len(clips), max(len(c) for c in clips)), dtype=np.float32)
+                for row, clip in zip(audio_batch, clips):
+                    row[:len(clip)] = clip
 
             # Get embedding (clipwise_output and embedding)
-            _, embedding = self._panns_model.inference(audio_batch)
-
-            # Return first (and only) embedding
-            return embedding[0]
+            _, embedding = self._run_panns(audio_batch)
+            return np.asarray(embedding, dtype=np.float32)
 
         except Exception as e:
             print(f"[Pattern] Embedding error: {e}", file=sys.stderr)
             return None
 
-    def quantize_embedding(self, embedding: np.ndarray) -> List[int]:
+    def _run_panns(self, audio_batch: np.ndarray):
+        """
+        PANNs forward pass under inference mode, with bf16 autocast when enabled.
+
+        Returns float32 (clipwise_output, embedding) numpy arrays, like
+        AudioTagging.inference(). The bf16 path calls the underlying network
+        directly: inference() converts with .numpy(), which rejects the bf16
+        tensors autocast produces.
+        """
+        import torch
+
+        if self._panns_autocast_dtype is None:
+            with torch.inference_mode():
+                return self._panns_model.inference(audio_batch)
+
+        model = self._panns_model.model
+        model.eval()
+        with torch.inference_mode(), torch.autocast('cuda', dtype=self._panns_autocast_dtype):
+            output_dict = model(torch.from_numpy(audio_batch).to(self._panns_model.device), None)
+        return (
+            output_dict['clipwise_output'].float().cpu().numpy(),
+            output_dict['embedding'].float().cpu().numpy(),
+        )
+
+    def _quantize_codes(self, embedding: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Power-law int8 codes and per-vector scale for an embedding."""
+        companded = np.sign(embedding) * np.sqrt(np.abs(embedding))
+        scale = float(np.abs(companded).max())
+        if scale == 0:
+            return np.zeros(len(embedding), dtype=np.int8), 0.0
+
+        # Quantize to int8 range [-127, 127]
+        quantized = np.clip(np.round(companded * (127.5 / scale)), -127, 127).astype(np.int8)
+        return quantized, scale
+
+    def quantize_embedding(self, embedding: np.ndarray) -> Tuple[str, float]:
         """
         Quantize float32 embedding to int8 for storage.
         Reduces storage from 8KB to 2KB per embedding.
+
+        Values are companded with a square-root power law before quantizing,
+        so the dense small-magnitude bins of PANNs embeddings get more of the
+        255 codes than the rare extremes.
+
+        Returns:
+            Tuple of (base64 of the packed int8 values, per-vector scale). The
+            scale must be stored alongside the values for dequantize_embedding().
         """
-        # Normalize to [-1, 1] range
-        max_val = np.abs(embedding).max()
-        if max_val > 0:
-            normalized = embedding / max_val
-        else:
-            normalized = embedding
+        quantized, scale = self._quantize_codes(embedding)
+        return base64.b64encode(quantized.tobytes()).decode('ascii'), scale
 
-        # Quantize to int8 range [-127, 127]
-        quantized = (normalized * 127).astype(np.int8)
-        return quantized.tolist()
+    def quantize_embedding_list(self, embedding: np.ndarray) -> Tuple[List[int], float]:
+        """quantize_embedding() with the int8 values as a list of ints (legacy format)."""
+        quantized, scale = self._quantize_codes(embedding)
+        return quantized.tolist(), scale
 
-    def dequantize_embedding(self, quantized: List[int]) -> np.ndarray:
+    def dequantize_embedding(
+        self,
+        quantized: Union[str, bytes, List[int], np.ndarray],
+        scale: Optional[float] = None
+    ) -> np.ndarray:
         """
-        Restore float32 from quantized int8 embedding.
+        Restore float32 from quantized int8 embedding (base64, bytes or list).
+
+        Embeddings stored without a scale predate power-law quantization
+        and are decoded with the original linear mapping.
         """
-        return np.array(quantized, dtype=np.float32) / 127.0
+        values = embedding_codes(quantized).astype(np.float32)
+        if scale is None:
+            return values / 127.0
+
+        companded = values * np.float32(scale / 127.5)
+        return np.sign(companded) * np.square(companded)
 
     def match_fingerprint(
         self,
-        fp1: List[int],
-        fp2: List[int],
+        fp1: Union[List[int], np.ndarray],
+        fp2: Union[List[int], np.ndarray],
         max_offset: int = 50
     ) -> Tuple[float, int]:
         """
@@ -221,40 +478,62 @@ class PatternEngine:
         Returns:
             Tuple of (similarity score 0-1, best offset in frames)
         """
-        if not fp1 or not fp2:
+        if fp1 is None or fp2 is None or len(fp1) == 0 or len(fp2) == 0:
             return 0.0, 0
 
-        fp1_arr = np.array(fp1, dtype=np.int32)
-        fp2_arr = np.array(fp2, dtype=np.int32)
+        fp1_arr = np.asarray(fp1, dtype=np.int32)
+        fp2_arr = np.asarray(fp2, dtype=np.int32)
+
+        min_frames = min(len(fp1_arr), len(fp2_arr))
+        if njit is not None and min_frames >= _NUMBA_MIN_FRAMES:
+            return self._match_fingerprint_numba(fp1_arr, fp2_arr, max_offset)
+        if min_frames * 32 < _FFT_MIN_BITS:
+            return self._match_fingerprint_direct(fp1_arr, fp2_arr, max_offset)
+        return self._match_fingerprint_fft(fp1_arr, fp2_arr, max_offset)
+
+    def _match_fingerprint_numba(
+        self,
+        fp1_arr: np.ndarray,
+        fp2_arr: np.ndarray,
+        max_offset: int
+    ) -> Tuple[float, int]:
+        """Same search as _match_fingerprint_direct() in the compiled pruned kernel."""
+        best, diff_bits, total_bits = _match_fp_numba(
+            np.ascontiguousarray(fp1_arr).view(np.uint32),
+            np.ascontiguousarray(fp2_arr).view(np.uint32),
+            max_offset
+        )
+        if best < 0:
+            return 0.0, 0
+        similarity = 1.0 - (diff_bits / total_bits)
+        if similarity <= 0.0:
+            return 0.0, 0
+        return similarity, int(best) - max_offset
 
+    def _match_fingerprint_direct(
+        self,
+        fp1_arr: np.ndarray,
+        fp2_arr: np.ndarray,
+        max_offset: int
+    ) -> Tuple[float, int]:
+        """Offset sweep with one XOR + popcount per offset (small fingerprints)."""
         best_score = 0.0
         best_offset = 0
 
-        # Try different offsets
+        # Try different offsets; frame i of fp1 lines up with frame i + offset of fp2
         for offset in range(-max_offset, max_offset + 1):
-            if offset < 0:
-                f1 = fp1_arr[-offset:]
-                f2 = fp2_arr[:len(f1)]
-            else:
-                f1 = fp1_arr[:len(fp1_arr) - offset] if offset > 0 else fp1_arr
-                f2 = fp2_arr[offset:offset + len(f1)]
-
-            # Ensure same length
-            min_len = min(len(f1), len(f2))
-            if min_len == 0:
+            start = max(0, -offset)
+            end = min(len(fp1_arr), len(fp2_arr) - offset)
+            min_len = end - start
+            if min_len <= 0:
                 continue
 
-            f1 = f1[:min_len]
-            f2 = f2[:min_len]
+            f1 = fp1_arr[start:end]
+            f2 = fp2_arr[start + offset:end + offset]
 
             # Calculate bit similarity using XOR and popcount
-            xor = np.bitwise_xor(f1, f2)
-
-            # Count matching bits
             # Each int32 has 32 bits, count differing bits
-            diff_bits = 0
-            for x in xor:
-                diff_bits += bin(x).count('1')
+            diff_bits = _count_bits(np.bitwise_xor(f1, f2))
 
             total_bits = min_len * 32
             similarity = 1.0 - (diff_bits / total_bits)
@@ -265,12 +544,66 @@ class PatternEngine:
 
         return best_score, best_offset
 
-    def cosine_similarity(self, emb1: np.ndarray, emb2: np.ndarray) -> float:
+    def _match_fingerprint_fft(
+        self,
+        fp1_arr: np.ndarray,
+        fp2_arr: np.ndarray,
+        max_offset: int
+    ) -> Tuple[float, int]:
+        """
+        Same search as _match_fingerprint_direct() via one FFT cross-correlation.
+
+        Bits are mapped to +/-1, so the correlation at a lag equals
+        matching bits minus differing bits over the overlap. Frame offsets are
+        the lags at multiples of 32 bits.
+        """
+        len1, len2 = len(fp1_arr), len(fp2_arr)
+        bits1 = np.unpackbits(np.ascontiguousarray(fp1_arr).view(np.uint8)).astype(np.float64) * 2 - 1
+        bits2 = np.unpackbits(np.ascontiguousarray(fp2_arr).view(np.uint8)).astype(np.float64) * 2 - 1
+
+        # Zero-pad past the full correlation length so lags don't wrap
+        n_fft = 1 << (len(bits1) + len(bits2) - 1).bit_length()
+        spectrum = np.conj(np.fft.rfft(bits1, n_fft)) * np.fft.rfft(bits2, n_fft)
+        corr = np.fft.irfft(spectrum, n_fft)
+
+        offsets = np.arange(-max_offset, max_offset + 1)
+        overlap = np.minimum(len1, len2 - offsets) - np.maximum(0, -offsets)
+        valid = overlap > 0
+        if not valid.any():
+            return 0.0, 0
+        offsets = offsets[valid]
+        total_bits = overlap[valid] * 32
+
+        agreement = np.rint(corr[(offsets * 32) % n_fft])
+        diff_bits = (total_bits - agreement) / 2
+        similarity = 1.0 - diff_bits / total_bits
+
+        best = int(np.argmax(similarity))
+        if similarity[best] <= 0.0:
+            return 0.0, 0
+        return float(similarity[best]), int(offsets[best])
+
+    def cosine_similarity(
+        self,
+        emb1: np.ndarray,
+        emb2: np.ndarray,
+        norm2: Optional[float] = None
+    ) -> float:
         """
         Calculate cosine similarity between two embeddings.
+
+        norm2 may be passed when the reference embedding's norm is cached.
         """
+        if norm2 is None and njit is not None:
+            # Dot product and both norms in one pass
+            return _cosine_numba(
+                np.ascontiguousarray(emb1, dtype=np.float32),
+                np.ascontiguousarray(emb2, dtype=np.float32)
+            )
+
         norm1 = np.linalg.norm(emb1)
-        norm2 = np.linalg.norm(emb2)
+        if norm2 is None:
+            norm2 = np.linalg.norm(emb2)
 
         if norm1 == 0 or norm2 == 0:
             return 0.0
@@ -286,14 +619,100 @@ class PatternDetector:
 
     def __init__(self, engine: PatternEngine, patterns: List[Dict]):
         self.engine = engine
-        self.patterns = patterns
         self.consecutive_matches: Dict[str, Dict] = {}  # pattern_id -> match state
         self.min_match_duration = 2.0  # Minimum seconds of consecutive matches
+        self.set_patterns(patterns)
 
     def set_patterns(self, patterns: List[Dict]):
         """Update the list of patterns to detect."""
         self.patterns = patterns
         self.consecutive_matches.clear()
+        self._prepare_patterns()
+
+    def _prepare_patterns(self):
+        """Convert reference fingerprints/embeddings to arrays once per pattern set."""
+        self._exact_patterns = []
+        self._semantic_patterns = []
+        self._prepared: Dict[str, Dict] = {}  # pattern_id -> reference arrays
+
+        for pattern in self.patterns or []:
+            prepared = {}
+
+            pattern_fp = pattern.get('fingerprint')
+            if pattern_fp:
+                prepared['fp_arr'] = np.asarray(pattern_fp, dtype=np.int32)
+
+            pattern_emb = pattern.get('embedding')
+            if pattern_emb is not None and len(pattern_emb):
+                # Dequantize if stored as int8
+                codes = embedding_codes(pattern_emb)
+                if codes is not None:
+                    prepared['emb_codes'] = codes
+                    emb_arr = self.engine.dequantize_embedding(
+                        codes, pattern.get('embeddingScale')
+                    )
+                else:
+                    emb_arr = np.asarray(pattern_emb, dtype=np.float32)
+                prepared['emb_arr'] = emb_arr
+                prepared['emb_norm'] = float(np.linalg.norm(emb_arr))
+
+            self._prepared[pattern['id']] = prepared
+            if pattern.get('type') == 'exact' and 'fp_arr' in prepared:
+                self._exact_patterns.append(pattern)
+            elif pattern.get('type') == 'semantic' and 'emb_arr' in prepared:
+                self._semantic_patterns.append(pattern)
+
+        # Semantic references stacked so one matrix-vector product scores them
+        # all. Linear int8 embeddings (stored without a scale) are scored on
+        # their int8 codes directly; everything else as unit-norm float rows.
+        float_rows, float_idx = [], []
+        int8_rows, int8_idx = [], []
+        for i, pattern in enumerate(self._semantic_patterns):
+            prepared = self._prepared[pattern['id']]
+            if 'emb_codes' in prepared and pattern.get('embeddingScale') is None:
+                int8_rows.append(prepared['emb_codes'])
+                int8_idx.append(i)
+            else:
+                norm = prepared['emb_norm']
+                emb_arr = prepared['emb_arr']
+                float_rows.append(emb_arr / norm if norm > 0 else np.zeros_like(emb_arr))
+                float_idx.append(i)
+
+        self._emb_matrix = np.stack(float_rows).astype(np.float32, copy=False) if float_rows else None
+        self._emb_matrix_idx = np.array(float_idx, dtype=np.intp)
+        self._emb_int8 = np.stack(int8_rows) if int8_rows else None
+        self._emb_int8_idx = np.array(int8_idx, dtype=np.intp)
+        self._emb_int8_norms = (
+            np.sqrt(np.einsum('ij,ij->i', self._emb_int8, self._emb_int8, dtype=np.int32)).astype(np.float32)
+            if int8_rows else None
+        )
+        self._emb_thresh = np.array(
+            [p.get('threshold', 0.85) for p in self._semantic_patterns],
+            dtype=np.float32
+        )
+
+    def _score_embeddings(self, chunk_emb: np.ndarray, chunk_norm: float) -> np.ndarray:
+        """Cosine similarity of the chunk embedding against every semantic pattern."""
+        scores = np.zeros(len(self._semantic_patterns), dtype=np.float32)
+
+        if self._emb_matrix is not None:
+            unit = (chunk_emb / chunk_norm).astype(np.float32, copy=False)
+            scores[self._emb_matrix_idx] = self._emb_matrix @ unit
+
+        if self._emb_int8 is not None:
+            # Quantize the chunk once and take int8 dot products with int32
+            # accumulation; the linear quantization scales cancel in the cosine
+            chunk_q = np.clip(
+                np.round(chunk_emb * (127.0 / np.abs(chunk_emb).max())), -127, 127
+            ).astype(np.int8)
+            dots = np.einsum('ij,j->i', self._emb_int8, chunk_q, dtype=np.int32)
+            q_norm = np.sqrt(np.einsum('i,i->', chunk_q, chunk_q, dtype=np.int32))
+            denom = self._emb_int8_norms * np.float32(q_norm)
+            scores[self._emb_int8_idx] = np.divide(
+                dots, denom, out=np.zeros(len(dots), dtype=np.float32), where=denom > 0
+            )
+
+        return scores
 
     def process_chunk(
         self,
@@ -317,52 +736,43 @@ class PatternDetector:
         detections = []
 
         # Phase 1: Exact fingerprint matching (fast path)
-        exact_patterns = [p for p in self.patterns if p.get('type') == 'exact']
+        exact_patterns = self._exact_patterns
         if exact_patterns:
             chunk_fp = self.engine.fingerprint(audio)
             if chunk_fp:
+                chunk_fp = np.asarray(chunk_fp, dtype=np.int32)
                 for pattern in exact_patterns:
-                    pattern_fp = pattern.get('fingerprint')
-                    if pattern_fp:
-                        score, offset = self.engine.match_fingerprint(chunk_fp, pattern_fp)
-                        if score > 0.8:  # High threshold for exact match
-                            detections.append({
-                                'pattern_id': pattern['id'],
-                                'pattern_name': pattern.get('name', 'Unknown'),
-                                'pattern_duration': pattern.get('duration', 0),
-                                'confidence': score,
-                                'offset': offset,
-                                'method': 'fingerprint',
-                                'timestamp': timestamp
-                            })
+                    pattern_fp = self._prepared[pattern['id']]['fp_arr']
+                    score, offset = self.engine.match_fingerprint(chunk_fp, pattern_fp)
+                    if score > 0.8:  # High threshold for exact match
+                        detections.append({
+                            'pattern_id': pattern['id'],
+                            'pattern_name': pattern.get('name', 'Unknown'),
+                            'pattern_duration': pattern.get('duration', 0),
+                            'confidence': score,
+                            'offset': offset,
+                            'method': 'fingerprint',
+                            'timestamp': timestamp
+                        })
 
         # Phase 2: Semantic embedding matching
-        semantic_patterns = [p for p in self.patterns if p.get('type') == 'semantic']
+        semantic_patterns = self._semantic_patterns
         if semantic_patterns:
             chunk_emb = self.engine.embed(audio)
-            if chunk_emb is not None:
-                for pattern in semantic_patterns:
-                    pattern_emb = pattern.get('embedding')
-                    if pattern_emb:
-                        # Dequantize if stored as int8
-                        if isinstance(pattern_emb[0], int):
-                            pattern_emb = self.engine.dequantize_embedding(pattern_emb)
-                        else:
-                            pattern_emb = np.array(pattern_emb)
-
-                        similarity = self.engine.cosine_similarity(chunk_emb, pattern_emb)
-                        threshold = pattern.get('threshold', 0.85)
-
-                        if similarity > threshold:
-                            detections.append({
-                                'pattern_id': pattern['id'],
-                                'pattern_name': pattern.get('name', 'Unknown'),
-                                'pattern_duration': pattern.get('duration', 0),
-                                'confidence': similarity,
-                                'offset': 0,
-                                'method': 'embedding',
-                                'timestamp': timestamp
-                            })
+            chunk_norm = np.linalg.norm(chunk_emb) if chunk_emb is not None else 0.0
+            if chunk_norm > 0:
+                scores = self._score_embeddings(chunk_emb, chunk_norm)
+                for i in np.nonzero(scores > self._emb_thresh)[0]:
+                    pattern = semantic_patterns[i]
+                    detections.append({
+                        'pattern_id': pattern['id'],
+                        'pattern_name': pattern.get('name', 'Unknown'),
+                        'pattern_duration': pattern.get('duration', 0),
+                        'confidence': float(scores[i]),
+                        'offset': 0,
+                        'method': 'embedding',
+                        'timestamp': timestamp
+                    })
 
         # Update consecutive match tracking
         self._update_consecutive_matches(detections, timestamp)
@@ -373,32 +783,40 @@ class PatternDetector:
         """Track consecutive detections for minimum duration requirement."""
         detected_ids = {d['pattern_id'] for d in detections}
 
-        for pattern_id in list(self.consecutive_matches.keys()):
-            if pattern_id not in detected_ids:
-                # Pattern no longer detected, clear tracking
-                del self.consecutive_matches[pattern_id]
+        # Pattern no longer detected, clear tracking
+        for pattern_id in self.consecutive_matches.keys() - detected_ids:
+            del self.consecutive_matches[pattern_id]
 
         for detection in detections:
             pattern_id = detection['pattern_id']
-            if pattern_id not in self.consecutive_matches:
+            match_state = self.consecutive_matches.get(pattern_id)
+            if match_state is None:
                 self.consecutive_matches[pattern_id] = {
                     'start_time': timestamp,
                     'last_time': timestamp,
-                    'detection': detection
+                    'detection': detection,
+                    'confirmed': False
                 }
             else:
-                self.consecutive_matches[pattern_id]['last_time'] = timestamp
-                self.consecutive_matches[pattern_id]['detection'] = detection
+                match_state['last_time'] = timestamp
+                match_state['detection'] = detection
 
     def get_confirmed_detections(self, timestamp: float) -> List[Dict]:
         """
-        Get patterns that have been detected for minimum duration.
+        Get patterns that have just reached the minimum detection duration.
+
+        Each tracked match is reported once, on the call where it first
+        qualifies; it is reported again only after it drops out and is
+        re-detected.
         """
         confirmed = []
 
-        for pattern_id, match_state in self.consecutive_matches.items():
+        for match_state in self.consecutive_matches.values():
+            if match_state['confirmed']:
+                continue
             duration = match_state['last_time'] - match_state['start_time']
             if duration >= self.min_match_duration:
+                match_state['confirmed'] = True
                 detection = match_state['detection'].copy()
                 detection['confirmed'] = True
                 detection['match_duration'] = duration
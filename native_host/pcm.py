@@ -0,0 +1,48 @@
+"""
+PCM16 Audio Conversion
+
+int16 -> float32 sample conversion shared by the speech engines. Uses a
+Numba-compiled loop when numba is installed, otherwise a fused NumPy multiply.
+"""
+
+import numpy as np
+from typing import Optional
+
+# int16 -> [-1, 1) float32 scale factor
+PCM16_SCALE = np.float32(1.0 / 32768.0)
+
+# Below this many samples thread start-up costs more than the parallel loop saves
+_NUMBA_MIN_SAMPLES = 65536
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _pcm16_to_float32_numba(src, dst):
+        """One pass over the samples: widen, convert and scale (vcvtdq2ps + vmulps)."""
+        for i in prange(src.shape[0]):
+            dst[i] = np.float32(src[i]) * PCM16_SCALE
+
+
+def pcm16_to_float32(pcm16: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Convert int16 PCM samples to float32 in [-1, 1).
+
+    Args:
+        pcm16: int16 sample array (e.g. an np.frombuffer view of decoded bytes)
+        out: Optional float32 array of the same length to write into
+
+    Returns:
+        The float32 samples (out, if given)
+    """
+    if out is None:
+        out = np.empty(len(pcm16), dtype=np.float32)
+
+    if njit is not None and len(pcm16) >= _NUMBA_MIN_SAMPLES:
+        _pcm16_to_float32_numba(pcm16, out)
+    else:
+        np.multiply(pcm16, PCM16_SCALE, out=out)
+    return out
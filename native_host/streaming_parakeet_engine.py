@@ -4,11 +4,15 @@ NVIDIA Parakeet Streaming Engine with Cache-Aware API
 True streaming transcription with ~500ms latency using NeMo's conformer_stream_step() API.
 """
 
+import contextlib
 import numpy as np
-import base64
+import binascii
 import torch
 from typing import Optional, List, Dict, Tuple
 
+from audio_buffer import AudioBuffer
+from pcm import pcm16_to_float32
+
 # NeMo imports (lazy loaded)
 nemo_asr = None
 
@@ -66,8 +70,28 @@ class StreamingParakeetEngine:
         if device == 'cuda':
             self.model = self.model.cuda()
 
-        # Set to eval mode
+            # TF32 tensor-core matmuls/convs for whatever stays in fp32
+            torch.backends.cuda.matmul.allow_tf32 = True
+            torch.backends.cudnn.allow_tf32 = True
+
+        # Set to eval mode and drop autograd bookkeeping for the weights
         self.model.eval()
+        for param in self.model.parameters():
+            param.requires_grad_(False)
+
+        # bf16 autocast for the streaming step on Ampere+ (fp32 weights kept)
+        self._autocast_dtype = None
+        if device == 'cuda' and torch.cuda.get_device_capability()[0] >= 8:
+            self._autocast_dtype = torch.bfloat16
+
+        # Fixed-shape staging for the CHUNK_SAMPLES input: a pinned host tensor
+        # copied asynchronously into a reused device tensor
+        if device == 'cuda':
+            self._host_in = torch.empty((1, self.CHUNK_SAMPLES), dtype=torch.float32, pin_memory=True)
+            self._host_in_np = self._host_in.numpy()
+            self._dev_in = torch.empty_like(self._host_in, device='cuda')
+            self._dev_len = torch.tensor([self.CHUNK_SAMPLES], dtype=torch.long, device='cuda')
+            self._in_copied = None
 
         # Configure streaming parameters
         att_context_size = self.LATENCY_CONFIGS.get(latency_mode, self.LATENCY_CONFIGS['medium'])
@@ -77,7 +101,10 @@ class StreamingParakeetEngine:
         self._reset_cache_state()
 
         # Buffer for incomplete frames
-        self.audio_buffer = np.array([], dtype=np.float32)
+        self.audio_buffer = AudioBuffer()
+
+        # Reused decode output; grown if a message carries more than one chunk
+        self._decode_scratch = np.empty(self.CHUNK_SAMPLES, dtype=np.float32)
 
         # Sequence tracking
         self.sequence_id = 0
@@ -104,12 +131,16 @@ class StreamingParakeetEngine:
             audio_base64: Base64-encoded PCM16 audio at 16kHz
 
         Returns:
-            Float32 numpy array normalized to [-1, 1]
+            Float32 numpy array normalized to [-1, 1]. This is a view of a
+            scratch buffer that the next call overwrites, so copy it if it
+            must outlive the current chunk.
         """
-        audio_bytes = base64.b64decode(audio_base64)
+        audio_bytes = binascii.a2b_base64(audio_base64)
         audio_int16 = np.frombuffer(audio_bytes, dtype=np.int16)
-        audio_float32 = audio_int16.astype(np.float32) / 32768.0
-        return audio_float32
+        n = len(audio_int16)
+        if n > len(self._decode_scratch):
+            self._decode_scratch = np.empty(n, dtype=np.float32)
+        return pcm16_to_float32(audio_int16, out=self._decode_scratch[:n])
 
     def process_streaming_chunk(
         self,
@@ -136,7 +167,7 @@ class StreamingParakeetEngine:
         new_audio = self.decode_audio(audio_base64)
 
         # Add to buffer
-        self.audio_buffer = np.concatenate([self.audio_buffer, new_audio])
+        self.audio_buffer.append(new_audio)
 
         # Process complete chunks
         results = {
@@ -148,11 +179,11 @@ class StreamingParakeetEngine:
 
         # Process in CHUNK_SAMPLES increments
         while len(self.audio_buffer) >= self.CHUNK_SAMPLES:
-            chunk = self.audio_buffer[:self.CHUNK_SAMPLES]
-            self.audio_buffer = self.audio_buffer[self.CHUNK_SAMPLES:]
+            chunk = self.audio_buffer.view()[:self.CHUNK_SAMPLES]
 
             # Process this chunk through the model
             chunk_result = self._process_chunk_internal(chunk, timestamp)
+            self.audio_buffer.consume(self.CHUNK_SAMPLES)
 
             # Accumulate results
             if chunk_result.get('interim_text'):
@@ -176,17 +207,9 @@ class StreamingParakeetEngine:
         Uses the cache-aware streaming API for low-latency processing.
         """
         try:
-            # Convert to tensor
-            audio_tensor = torch.from_numpy(audio_chunk).unsqueeze(0)
-            if self.device == 'cuda':
-                audio_tensor = audio_tensor.cuda()
-
-            # Length tensor
-            audio_len = torch.tensor([len(audio_chunk)], dtype=torch.long)
-            if self.device == 'cuda':
-                audio_len = audio_len.cuda()
+            audio_tensor, audio_len = self._input_tensors(audio_chunk)
 
-            with torch.no_grad():
+            with torch.inference_mode(), self._autocast():
                 # Check if model supports streaming
                 if hasattr(self.model, 'conformer_stream_step'):
                     # Use cache-aware streaming API
@@ -233,19 +256,43 @@ class StreamingParakeetEngine:
             traceback.print_exc()
             return {'interim_text': '', 'final_text': '', 'final_segments': []}
 
+    def _input_tensors(self, audio_chunk: np.ndarray) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Model input and length tensors for one chunk, on the engine's device."""
+        if self.device == 'cuda' and len(audio_chunk) == self.CHUNK_SAMPLES:
+            # Don't overwrite the pinned buffer while its last copy is in flight
+            if self._in_copied is not None:
+                self._in_copied.synchronize()
+            self._host_in_np[0] = audio_chunk
+            self._dev_in.copy_(self._host_in, non_blocking=True)
+            self._in_copied = torch.cuda.Event()
+            self._in_copied.record()
+            return self._dev_in, self._dev_len
+
+        # Convert to tensor
+        audio_tensor = torch.from_numpy(audio_chunk).unsqueeze(0)
+        audio_len = torch.tensor([len(audio_chunk)], dtype=torch.long)
+        if self.device == 'cuda':
+            audio_tensor = audio_tensor.cuda()
+            audio_len = audio_len.cuda()
+        return audio_tensor, audio_len
+
+    def _autocast(self):
+        """Autocast context for the streaming step (no-op without bf16)."""
+        if self._autocast_dtype is None:
+            return contextlib.nullcontext()
+        return torch.autocast('cuda', dtype=self._autocast_dtype)
+
     def _decode_ids(self, ids: torch.Tensor) -> str:
         """Decode token IDs to text using the model's tokenizer."""
         try:
             if hasattr(self.model, 'tokenizer'):
-                # Filter out blank tokens (usually index 0 or a special value)
-                ids_list = ids.cpu().tolist()
-                # Remove consecutive duplicates (CTC collapse)
-                collapsed = []
-                prev = None
-                for id in ids_list:
-                    if id != prev and id != 0:  # Assuming 0 is blank
-                        collapsed.append(id)
-                    prev = id
+                # Remove consecutive duplicates (CTC collapse) and blank tokens
+                # (assuming 0 is blank) on the ids' device; only the kept ids
+                # are copied back
+                keep = torch.ones_like(ids, dtype=torch.bool)
+                keep[1:] = ids[1:] != ids[:-1]
+                keep &= ids != 0
+                collapsed = ids[keep].tolist()
                 return self.model.tokenizer.ids_to_text(collapsed)
             return ""
         except:
@@ -271,12 +318,13 @@ class StreamingParakeetEngine:
 
         # Process any remaining buffered audio
         if len(self.audio_buffer) > 0:
+            buffered = self.audio_buffer.view()
             # Pad to minimum chunk size if needed
-            if len(self.audio_buffer) < self.CHUNK_SAMPLES:
-                padding = np.zeros(self.CHUNK_SAMPLES - len(self.audio_buffer), dtype=np.float32)
-                chunk = np.concatenate([self.audio_buffer, padding])
+            if len(buffered) < self.CHUNK_SAMPLES:
+                chunk = np.zeros(self.CHUNK_SAMPLES, dtype=np.float32)
+                chunk[:len(buffered)] = buffered
             else:
-                chunk = self.audio_buffer
+                chunk = buffered
 
             chunk_result = self._process_chunk_internal(chunk[:self.CHUNK_SAMPLES], timestamp)
 
@@ -290,14 +338,14 @@ class StreamingParakeetEngine:
                 }]
 
         # Clear buffer
-        self.audio_buffer = np.array([], dtype=np.float32)
+        self.audio_buffer.clear()
 
         return results
 
     def reset_cache(self):
         """Reset encoder cache state on video seek or session reset."""
         self._reset_cache_state()
-        self.audio_buffer = np.array([], dtype=np.float32)
+        self.audio_buffer.clear()
         self.interim_text = ""
         self.finalized_text = ""
         self.last_finalized_time = 0.0
@@ -324,14 +372,14 @@ class FallbackStreamingEngine:
 
     def __init__(self, batch_engine):
         """
-        Initialize with a batch engine (ParakeetEngine or FasterWhisperEngine).
+        Initialize with a batch engine (ParakeetEngine, FasterWhisperEngine or WhisperEngine).
 
         Args:
-            batch_engine: Batch transcription engine with transcribe_with_segments method
+            batch_engine: Batch transcription engine with a transcribe_array method
         """
         self.engine = batch_engine
         self.sample_rate = 16000
-        self.audio_buffer = np.array([], dtype=np.float32)
+        self.audio_buffer = AudioBuffer()
         self.last_text = ""
         self.min_chunk_duration = 2.0  # Minimum seconds before processing
 
@@ -344,7 +392,7 @@ class FallbackStreamingEngine:
         """Process chunk using batch engine with accumulated buffer."""
         # Decode and accumulate
         new_audio = self.engine.decode_audio(audio_base64)
-        self.audio_buffer = np.concatenate([self.audio_buffer, new_audio])
+        self.audio_buffer.append(new_audio)
 
         buffer_duration = len(self.audio_buffer) / self.sample_rate
 
@@ -357,12 +405,8 @@ class FallbackStreamingEngine:
 
         # Process when we have enough audio
         if buffer_duration >= self.min_chunk_duration:
-            # Encode buffer for batch processing
-            audio_int16 = (self.audio_buffer * 32767).astype(np.int16)
-            audio_b64 = base64.b64encode(audio_int16.tobytes()).decode('utf-8')
-
-            # Transcribe
-            result = self.engine.transcribe_with_segments(audio_b64)
+            # Transcribe the buffered samples directly
+            result = self.engine.transcribe_array(self.audio_buffer.view())
 
             if result.get('text'):
                 text = result['text'].strip()
@@ -383,13 +427,13 @@ class FallbackStreamingEngine:
 
             # Keep a small overlap for continuity
             overlap_samples = int(0.5 * self.sample_rate)
-            self.audio_buffer = self.audio_buffer[-overlap_samples:]
+            self.audio_buffer.keep_last(overlap_samples)
 
         return results
 
     def reset_cache(self):
         """Reset state."""
-        self.audio_buffer = np.array([], dtype=np.float32)
+        self.audio_buffer.clear()
         self.last_text = ""
 
     def finalize_stream(self, timestamp: float) -> Dict:
@@ -397,10 +441,7 @@ class FallbackStreamingEngine:
         results = {'final_text': '', 'final_segments': []}
 
         if len(self.audio_buffer) > self.sample_rate * 0.5:  # At least 0.5s
-            audio_int16 = (self.audio_buffer * 32767).astype(np.int16)
-            audio_b64 = base64.b64encode(audio_int16.tobytes()).decode('utf-8')
-
-            result = self.engine.transcribe_with_segments(audio_b64)
+            result = self.engine.transcribe_array(self.audio_buffer.view())
 
             if result.get('text'):
                 results['final_text'] = result['text'].strip()
@@ -411,5 +452,5 @@ class FallbackStreamingEngine:
                         'text': seg['text']
                     })
 
-        self.audio_buffer = np.array([], dtype=np.float32)
+        self.audio_buffer.clear()
         return results
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The host modules import each other as top-level modules (e.g. `from pcm import ...`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from pattern_engine import PANNS_SAMPLE_RATE, PatternEngine
+
+
+class _Bf16Cnn(torch.nn.Module):
+    """Stands in for the PANNs CNN14 under autocast: bf16 outputs."""
+
+    def forward(self, audio, mixup_lambda=None):
+        batch = audio.shape[0]
+        return {
+            'clipwise_output': torch.rand(batch, 527).to(torch.bfloat16),
+            'embedding': torch.rand(batch, 2048).to(torch.bfloat16),
+        }
+
+
+class _AudioTagging:
+    """Mirrors panns_inference.AudioTagging: inference() calls .numpy() itself."""
+
+    def __init__(self):
+        self.model = _Bf16Cnn()
+        self.device = 'cpu'
+
+    def inference(self, audio):
+        output_dict = self.model(torch.Tensor(audio), None)
+        return (
+            output_dict['clipwise_output'].data.cpu().numpy(),
+            output_dict['embedding'].data.cpu().numpy(),
+        )
+
+
+def _bf16_engine():
+    engine = PatternEngine(device='cuda')
+    engine._panns_model = _AudioTagging()
+    engine._panns_loaded = True
+    engine._panns_autocast_dtype = torch.bfloat16
+    return engine
+
+
+@pytest.mark.filterwarnings('ignore::UserWarning')
+def test_bf16_embedding_is_float32():
+    engine = _bf16_engine()
+    audio = np.zeros(PANNS_SAMPLE_RATE, dtype=np.float32)
+
+    embedding = engine.embed(audio, sample_rate=PANNS_SAMPLE_RATE)
+
+    assert embedding is not None
+    assert embedding.dtype == np.float32
+    assert embedding.shape == (2048,)
+
+
+@pytest.mark.filterwarnings('ignore::UserWarning')
+def test_bf16_run_panns_returns_float32_outputs():
+    engine = _bf16_engine()
+    batch = np.zeros((2, PANNS_SAMPLE_RATE), dtype=np.float32)
+
+    clipwise, embedding = engine._run_panns(batch)
+
+    assert clipwise.dtype == np.float32
+    assert embedding.dtype == np.float32
+    assert embedding.shape == (2, 2048)
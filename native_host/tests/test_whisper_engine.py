@@ -0,0 +1,70 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+whisper = pytest.importorskip('whisper')
+
+from whisper_engine import WhisperEngine
+
+
+def _cpu_engine():
+    """WhisperEngine on CPU with the model stubbed out (no checkpoint download)."""
+    engine = WhisperEngine.__new__(WhisperEngine)
+    engine.device = 'cpu'
+    engine.n_mels = 80
+    engine._fp16 = False
+    engine._autocast_dtype = None
+    engine._lock = threading.RLock()
+    engine._pad_buf = torch.zeros(whisper.audio.N_SAMPLES)
+    engine._tokenizer = whisper.tokenizer.get_tokenizer(True, num_languages=99, task='transcribe')
+    engine._eager_encoder = lambda mel: mel
+    engine.model = SimpleNamespace()
+    return engine
+
+
+def _result(engine, text, no_speech_prob, avg_logprob, compression_ratio=1.2):
+    tokenizer = engine._tokenizer
+    tokens = [tokenizer.timestamp_begin] + tokenizer.encode(text) + [tokenizer.timestamp_begin + 100]
+    return SimpleNamespace(
+        text=text, tokens=tokens, language='en', no_speech_prob=no_speech_prob,
+        avg_logprob=avg_logprob, compression_ratio=compression_ratio
+    )
+
+
+def _run_batch(monkeypatch, engine, decoded):
+    monkeypatch.setattr(whisper, 'decode', lambda model, mel, options: decoded)
+    clips = [np.zeros(2 * whisper.audio.SAMPLE_RATE, dtype=np.float32) for _ in decoded]
+    return engine.transcribe_batch(clips, 'en')
+
+
+def test_silent_clip_in_batch_returns_empty_text(monkeypatch):
+    engine = _cpu_engine()
+    decoded = [
+        _result(engine, ' Hello there.', no_speech_prob=0.05, avg_logprob=-0.2),
+        _result(engine, ' Thank you.', no_speech_prob=0.9, avg_logprob=-1.4),
+    ]
+
+    speech, silence = _run_batch(monkeypatch, engine, decoded)
+
+    assert speech['text'] == 'Hello there.'
+    assert [seg['text'] for seg in speech['segments']] == ['Hello there.']
+    assert silence['text'] == ''
+    assert silence['segments'] == []
+
+
+def test_repetitive_clip_in_batch_is_retried_on_the_single_clip_path(monkeypatch):
+    engine = _cpu_engine()
+    retried = {'text': 'retried', 'segments': [], 'language': 'en'}
+    monkeypatch.setattr(engine, 'transcribe_array', lambda audio, language: retried)
+    decoded = [
+        _result(engine, ' Hello there.', no_speech_prob=0.05, avg_logprob=-0.2),
+        _result(engine, ' la la la la la la', no_speech_prob=0.05, avg_logprob=-0.3, compression_ratio=3.1),
+    ]
+
+    speech, repetitive = _run_batch(monkeypatch, engine, decoded)
+
+    assert speech['text'] == 'Hello there.'
+    assert repetitive is retried
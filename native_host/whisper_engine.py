@@ -2,26 +2,51 @@
 Whisper Speech-to-Text Engine with GPU Optimization
 """
 
+import contextlib
+import string
+import threading
+from collections import deque
 import whisper
 import torch
 import numpy as np
-import base64
+import binascii
 from typing import Optional
 
+from pcm import pcm16_to_float32
+
 
 class WhisperEngine:
     """Wrapper for Whisper model with GPU optimization."""
 
-    def __init__(self, model_name: str = 'large-v3', device: str = 'cuda'):
+    # Initial pinned/device upload buffer size (30s at 16kHz), grown on demand
+    MAX_CHUNK_SAMPLES = 480000
+
+    # model.transcribe()'s defaults, applied to batch decode results so a
+    # chunk gets the same gating whichever path it takes
+    COMPRESSION_RATIO_THRESHOLD = 2.4
+    LOGPROB_THRESHOLD = -1.0
+    NO_SPEECH_THRESHOLD = 0.6
+
+    def __init__(self, model_name: str = 'large-v3', device: str = 'cuda', compile_encoder: bool = True):
         """
         Initialize the Whisper engine.
 
         Args:
             model_name: Whisper model size ('tiny', 'base', 'small', 'medium', 'large', 'large-v3')
             device: Device to run on ('cuda' or 'cpu')
+            compile_encoder: torch.compile the audio encoder on CUDA (falls back
+                to eager if compilation isn't supported here)
         """
         self.device = device
         self.model_name = model_name
+        self._tokenizer = None
+
+        # The staging/upload buffers and _pad_buf below are shared by every
+        # call, and the tensors handed out are views into them; the batch
+        # workers and the streaming worker both call into the same engine,
+        # so each transcription holds this from staging until its inference
+        # is done (reentrant: transcribe_batch falls back to transcribe_array)
+        self._lock = threading.RLock()
 
         # Check CUDA availability
         if device == 'cuda' and not torch.cuda.is_available():
@@ -32,9 +57,158 @@ class WhisperEngine:
         # Load model
         self.model = whisper.load_model(model_name, device=self.device)
 
-        # Enable FP16 for faster inference on GPU
+        # Uncompiled encoder, for inputs whose shape the compiled one wasn't
+        # captured at (see _compile_encoder)
+        self._eager_encoder = self.model.encoder
+
+        # large-v3 uses 128 mel bins, earlier models 80
+        self.n_mels = self.model.dims.n_mels
+
+        # Reused 30s input window for the single-window paths, instead of a
+        # fresh pad_or_trim allocation per chunk
+        self._pad_buf = torch.zeros(whisper.audio.N_SAMPLES, dtype=torch.float32, device=self.device)
+
+        # Reduced precision on GPU: bf16 autocast over fp32 weights on Ampere+
+        # (wider range than fp16, no inf/nan in LayerNorm stats), fp16 weights
+        # on older GPUs. Attention goes through torch SDPA, which already
+        # selects the flash kernels on Hopper; FP8 GEMMs would need a
+        # different inference runtime than openai-whisper.
+        self._autocast_dtype = None
+        self._fp16 = False
         if self.device == 'cuda':
-            self.model = self.model.half()
+            if torch.cuda.get_device_capability()[0] >= 8:
+                self._autocast_dtype = torch.bfloat16
+                # whisper.decode accepts only fp16/fp32 audio features;
+                # hand it fp32 and let autocast re-cast inside the decoder
+                self.model.encoder.register_forward_hook(
+                    lambda module, inputs, output: output.float()
+                )
+            else:
+                self.model = self.model.half()
+                self._fp16 = True
+
+            # Tensor cores for any remaining fp32 matmuls/convs, and let cuDNN
+            # pick conv kernels once for the fixed 30s input shape
+            torch.backends.cuda.matmul.allow_tf32 = True
+            torch.backends.cudnn.allow_tf32 = True
+            torch.backends.cudnn.benchmark = True
+            torch.set_float32_matmul_precision('high')
+
+            if compile_encoder:
+                self._compile_encoder()
+
+            # Audio is decoded straight into page-locked memory and copied on
+            # a side stream, so the H2D copy runs at full PCIe bandwidth
+            # without a pageable bounce buffer
+            self._copy_stream = torch.cuda.Stream()
+            self._copy_done = None
+            self._alloc_upload_buffers(self.MAX_CHUNK_SAMPLES)
+
+    def _compile_encoder(self):
+        """
+        Replace the encoder with a torch.compile'd version if it compiles.
+
+        Only the single-window paths use it, and they always hand it a
+        (1, n_mels, 3000) mel, so one static graph with CUDA-graph replay
+        covers every call. transcribe_batch() runs multi-clip batches through
+        the eager encoder instead: with dynamic=False each new batch size
+        would recompile and capture another graph. The decoder is left eager
+        too: its kv-cache grows by one token per step, which would force a
+        recompile or re-capture on every step.
+        """
+        import sys
+
+        if not hasattr(torch, 'compile'):
+            return
+
+        encoder = self._eager_encoder
+        try:
+            compiled = torch.compile(encoder, mode='reduce-overhead', dynamic=False)
+
+            # Compile (and capture) now on a dummy input, so failures surface
+            # here and the first real chunk doesn't pay for it
+            dtype = torch.float16 if self._fp16 else torch.float32
+            dummy = torch.zeros(1, self.n_mels, whisper.audio.N_FRAMES, dtype=dtype, device=self.device)
+            with torch.inference_mode(), self._autocast():
+                compiled(dummy)
+
+            self.model.encoder = compiled
+        except Exception as e:
+            print(f"Encoder compile unavailable, using eager: {e}", file=sys.stderr, flush=True)
+
+    def _alloc_upload_buffers(self, num_samples: int):
+        """(Re)allocate the pinned host and device upload buffers."""
+        self._pinned = torch.empty(num_samples, dtype=torch.float32, pin_memory=True)
+        self._pinned_np = self._pinned.numpy()
+        self._gpu = torch.empty(num_samples, dtype=torch.float32, device='cuda')
+
+    def _prepare_input(self, audio):
+        """
+        Turn base64 PCM16 audio or an already-decoded float32 array into the
+        form handed to whisper.
+
+        On CUDA the samples are written into the pinned staging buffer and
+        uploaded asynchronously; the returned tensor is a view of the device
+        buffer that stays valid until the next call. On CPU this is just the
+        decoded numpy array.
+        """
+        if isinstance(audio, np.ndarray):
+            if self.device != 'cuda':
+                return audio
+            n = len(audio)
+            np.copyto(self._stage(n), audio)
+            return self._upload(n)
+
+        if self.device != 'cuda':
+            return self.decode_audio(audio)
+
+        audio_int16 = np.frombuffer(binascii.a2b_base64(audio), dtype=np.int16)
+        n = len(audio_int16)
+        pcm16_to_float32(audio_int16, out=self._stage(n))
+        return self._upload(n)
+
+    def _stage(self, n: int) -> np.ndarray:
+        """Return the first n samples of the pinned staging buffer, ready for writing."""
+        # Don't overwrite the staging buffer while the previous copy is in flight
+        if self._copy_done is not None:
+            self._copy_done.synchronize()
+        if n > len(self._pinned_np):
+            self._alloc_upload_buffers(n)
+        return self._pinned_np[:n]
+
+    def _upload(self, n: int) -> torch.Tensor:
+        """Copy the first n staged samples to the device on the copy stream."""
+        with torch.cuda.stream(self._copy_stream):
+            # Work already queued on the default stream may still be reading
+            # the device buffer (e.g. the previous item of a batch)
+            self._copy_stream.wait_stream(torch.cuda.current_stream())
+            self._gpu[:n].copy_(self._pinned[:n], non_blocking=True)
+            self._copy_done = torch.cuda.Event()
+            self._copy_done.record(self._copy_stream)
+
+        # Compute on the default stream must see the finished upload
+        torch.cuda.current_stream().wait_stream(self._copy_stream)
+        return self._gpu[:n]
+
+    def _pad_or_trim(self, audio) -> torch.Tensor:
+        """
+        whisper.pad_or_trim into the preallocated window.
+
+        The result is only valid until the next call; the mel computed from
+        it is a new tensor, so callers take that right away.
+        """
+        if isinstance(audio, np.ndarray):
+            audio = torch.from_numpy(audio)
+        n = min(len(audio), len(self._pad_buf))
+        self._pad_buf[:n].copy_(audio[:n])
+        self._pad_buf[n:].zero_()
+        return self._pad_buf
+
+    def _autocast(self):
+        """bf16 autocast context on Ampere+ GPUs, otherwise a no-op."""
+        if self._autocast_dtype is None:
+            return contextlib.nullcontext()
+        return torch.autocast(device_type='cuda', dtype=self._autocast_dtype)
 
     def decode_audio(self, audio_base64: str) -> np.ndarray:
         """
@@ -46,10 +220,11 @@ class WhisperEngine:
         Returns:
             Float32 numpy array normalized to [-1, 1]
         """
-        audio_bytes = base64.b64decode(audio_base64)
+        # a2b_base64 is the C decoder behind b64decode, minus the Python-level
+        # wrapper; it accepts ASCII str directly
+        audio_bytes = binascii.a2b_base64(audio_base64)
         audio_int16 = np.frombuffer(audio_bytes, dtype=np.int16)
-        audio_float32 = audio_int16.astype(np.float32) / 32768.0
-        return audio_float32
+        return pcm16_to_float32(audio_int16)
 
     def transcribe_chunk(self, audio_base64: str, language: str = 'en') -> dict:
         """
@@ -62,28 +237,38 @@ class WhisperEngine:
         Returns:
             Dict with 'text' and 'language' keys
         """
-        audio = self.decode_audio(audio_base64)
+        with self._lock:
+            return self._transcribe_chunk(audio_base64, language)
 
+    def _transcribe_chunk(self, audio_base64: str, language: str) -> dict:
+        """transcribe_chunk() body; the caller holds _lock."""
         # Pad or trim to 30 seconds (Whisper's expected input)
-        audio = whisper.pad_or_trim(audio)
+        audio = self._pad_or_trim(self._prepare_input(audio_base64))
 
-        # Create mel spectrogram
-        mel = whisper.log_mel_spectrogram(audio).to(self.device)
-        if self.device == 'cuda':
+        # Create mel spectrogram on the model's device; the filterbank is
+        # cached per device by whisper.audio.mel_filters
+        mel = whisper.log_mel_spectrogram(audio, n_mels=self.n_mels)
+        if self._fp16:
             mel = mel.half()
 
-        # Detect language if needed
-        if language == 'auto':
-            _, probs = self.model.detect_language(mel)
-            language = max(probs, key=probs.get)
-
-        # Decode
-        options = whisper.DecodingOptions(
-            language=language,
-            fp16=(self.device == 'cuda'),
-            without_timestamps=False
-        )
-        result = whisper.decode(self.model, mel, options)
+        with torch.inference_mode(), self._autocast():
+            # Run the encoder once; detect_language and decode both skip
+            # their own encoder pass when handed [1, n_audio_ctx, n_audio_state]
+            # features instead of a mel
+            audio_features = self.model.embed_audio(mel.unsqueeze(0))
+
+            # Detect language if needed
+            if language == 'auto':
+                _, probs = self.model.detect_language(audio_features)
+                language = max(probs[0], key=probs[0].get)
+
+            # Decode
+            options = whisper.DecodingOptions(
+                language=language,
+                fp16=self._fp16,
+                without_timestamps=False
+            )
+            result = whisper.decode(self.model, audio_features, options)[0]
 
         return {
             'text': result.text,
@@ -101,15 +286,162 @@ class WhisperEngine:
         Returns:
             Dict with 'text', 'segments', and 'language' keys
         """
-        audio = self.decode_audio(audio_base64)
+        with self._lock:
+            return self._transcribe_segments(self._prepare_input(audio_base64), language)
+
+    def transcribe_array(self, audio: np.ndarray, language: Optional[str] = 'en') -> dict:
+        """
+        Transcribe already-decoded audio with segment-level timestamps.
+
+        Same result as transcribe_with_segments() for callers that hold float32
+        samples, without re-encoding them to base64 PCM16.
+
+        Args:
+            audio: Float32 audio at 16kHz
+            language: Language code, 'auto' for detection, or None
+
+        Returns:
+            Dict with 'text', 'segments', and 'language' keys
+        """
+        with self._lock:
+            return self._transcribe_segments(self._prepare_input(audio), language)
+
+    def transcribe_batch(self, audio_list: list, language: Optional[str] = 'en') -> list:
+        """
+        Transcribe several float32 clips with one batched encoder/decoder pass.
+
+        Clips up to 30s are padded into a [B, n_mels, 3000] mel batch and run
+        through a single whisper.decode call; segments come from the decoded
+        timestamp tokens. Longer clips go through transcribe_array() on their
+        own. Results are gated like model.transcribe(): silent windows come
+        back empty, and decodes that are too repetitive or too unlikely are
+        redone through transcribe_array() with its temperature fallback.
+
+        Args:
+            audio_list: Float32 audio arrays at 16kHz
+            language: Language code, 'auto' for detection, or None
+
+        Returns:
+            One dict per clip, in order, with 'text', 'segments', and
+            'language' keys (same shape as transcribe_array())
+        """
+        with self._lock:
+            return self._transcribe_batch(audio_list, language)
+
+    def _transcribe_batch(self, audio_list: list, language: Optional[str]) -> list:
+        """transcribe_batch() body; the caller holds _lock."""
+        results = [None] * len(audio_list)
+        batch_idx = []
+        mels = []
+        for i, audio in enumerate(audio_list):
+            if len(audio) > whisper.audio.N_SAMPLES:
+                results[i] = self.transcribe_array(audio, language)
+                continue
+            padded = self._pad_or_trim(self._prepare_input(audio))
+            mels.append(whisper.log_mel_spectrogram(padded, n_mels=self.n_mels))
+            batch_idx.append(i)
+
+        if not mels:
+            return results
+
+        mel = torch.stack(mels)
+        if self._fp16:
+            mel = mel.half()
 
-        result = self.model.transcribe(
-            audio,
-            language=None if language == 'auto' else language,
-            fp16=(self.device == 'cuda'),
-            word_timestamps=False,  # Segment-level is faster
-            verbose=False
-        )
+        with torch.inference_mode(), self._autocast():
+            if len(mels) > 1:
+                # The compiled encoder is only captured at batch size 1;
+                # decode skips its own encoder pass when handed features
+                mel = self._eager_encoder(mel)
+            options = whisper.DecodingOptions(
+                language=None if language == 'auto' else language,
+                fp16=self._fp16,
+                without_timestamps=False
+            )
+            decoded = whisper.decode(self.model, mel, options)
+
+        tokenizer = self._get_tokenizer()
+        for i, result in zip(batch_idx, decoded):
+            if (result.no_speech_prob > self.NO_SPEECH_THRESHOLD
+                    and result.avg_logprob < self.LOGPROB_THRESHOLD):
+                # Silence: transcribe() skips the window the same way
+                results[i] = {'text': '', 'segments': [], 'language': result.language}
+                continue
+            if (result.compression_ratio > self.COMPRESSION_RATIO_THRESHOLD
+                    or result.avg_logprob < self.LOGPROB_THRESHOLD):
+                # Failed greedy decode: retry with transcribe()'s fallback
+                results[i] = self.transcribe_array(audio_list[i], language)
+                continue
+
+            duration = len(audio_list[i]) / whisper.audio.SAMPLE_RATE
+            results[i] = {
+                'text': result.text.strip(),
+                'segments': self._segments_from_tokens(result.tokens, tokenizer, duration),
+                'language': result.language
+            }
+
+        return results
+
+    def _get_tokenizer(self):
+        """Tokenizer used to split batch decode output into segments."""
+        if self._tokenizer is None:
+            self._tokenizer = whisper.tokenizer.get_tokenizer(
+                self.model.is_multilingual,
+                num_languages=self.model.num_languages,
+                task='transcribe'
+            )
+        return self._tokenizer
+
+    @staticmethod
+    def _segments_from_tokens(tokens: list, tokenizer, duration: float) -> list:
+        """
+        Split decoded tokens into segments at timestamp tokens.
+
+        Whisper emits <|start|> text <|end|> pairs; a trailing segment with no
+        closing timestamp runs to the end of the clip.
+        """
+        ts_begin = tokenizer.timestamp_begin
+        time_per_token = 1.0 / whisper.audio.TOKENS_PER_SECOND
+
+        segments = []
+        start = None
+        text_tokens = []
+        for token in tokens:
+            if token < ts_begin:
+                text_tokens.append(token)
+                continue
+
+            time = (token - ts_begin) * time_per_token
+            if start is not None and text_tokens:
+                segments.append({
+                    'start': start,
+                    'end': time,
+                    'text': tokenizer.decode(text_tokens).strip()
+                })
+                text_tokens = []
+                start = None
+            else:
+                start = time
+
+        if text_tokens:
+            segments.append({
+                'start': start if start is not None else 0.0,
+                'end': duration,
+                'text': tokenizer.decode(text_tokens).strip()
+            })
+
+        return [seg for seg in segments if seg['text']]
+
+    def _transcribe_segments(self, audio, language: Optional[str]) -> dict:
+        """Run whisper's full transcribe loop on a prepared input (see _prepare_input)."""
+        with torch.inference_mode(), self._autocast():
+            result = self.model.transcribe(
+                audio,
+                language=None if language == 'auto' else language,
+                fp16=self._fp16,
+                word_timestamps=False,  # Segment-level is faster
+                verbose=False
+            )
 
         # Format segments
         segments = []
@@ -127,6 +459,42 @@ class WhisperEngine:
         }
 
 
+_HASH_BASE = 1000003
+_HASH_MOD = (1 << 61) - 1
+_WORD_STRIP = string.punctuation + '\u2019\u201c\u201d'
+
+
+def _normalize_word(word: str) -> str:
+    """Case- and punctuation-insensitive form used to compare words."""
+    return word.strip(_WORD_STRIP).lower()
+
+
+def _overlap_length(prev_words, words: list, min_len: int = 2) -> int:
+    """
+    Length of the longest prefix of words that repeats a suffix of prev_words.
+
+    Both sides are polynomial-hashed incrementally (the suffix grows to the
+    left, the prefix to the right), so every candidate length costs O(1);
+    hash hits are confirmed by direct comparison.
+    """
+    limit = min(len(prev_words), len(words))
+    if limit < min_len:
+        return 0
+
+    prev = list(prev_words)
+    suffix_hash = 0
+    prefix_hash = 0
+    power = 1
+    best = 0
+    for k in range(1, limit + 1):
+        suffix_hash = (hash(prev[-k]) % _HASH_MOD * power + suffix_hash) % _HASH_MOD
+        prefix_hash = (prefix_hash * _HASH_BASE + hash(words[k - 1]) % _HASH_MOD) % _HASH_MOD
+        power = power * _HASH_BASE % _HASH_MOD
+        if k >= min_len and suffix_hash == prefix_hash and prev[-k:] == words[:k]:
+            best = k
+    return best
+
+
 class StreamingWhisper:
     """Streaming wrapper that handles overlapping audio chunks for continuity."""
 
@@ -141,9 +509,19 @@ class StreamingWhisper:
         self.engine = engine
         self.overlap_seconds = overlap_seconds
         self.sample_rate = 16000
-        self.pending_audio = np.array([], dtype=np.float32)
+        self._overlap_samples = int(self.sample_rate * overlap_seconds)
         self.last_end_time = 0.0
 
+        # Normalized recently emitted words; the overlap region gets
+        # re-transcribed, and timestamp drift lets repeated words through
+        self._last_words = deque(maxlen=32)
+
+        # Reusable overlap+chunk buffer: the previous chunk's tail lives in
+        # _ring[:_tail_len] and each new chunk is copied in right after it,
+        # so steady-state chunks need no concatenation
+        self._ring = np.empty(0, dtype=np.float32)
+        self._tail_len = 0
+
     def process_chunk(self, audio_base64: str, chunk_start_time: float, language: str = 'en') -> list:
         """
         Process an audio chunk with overlap handling.
@@ -159,49 +537,97 @@ class StreamingWhisper:
         # Decode new audio
         new_audio = self.engine.decode_audio(audio_base64)
 
-        # Calculate overlap samples
-        overlap_samples = int(self.sample_rate * self.overlap_seconds)
+        tail_len = self._tail_len
+        total = tail_len + len(new_audio)
+
+        # Grow the buffer if this chunk is longer than any seen so far
+        if total > len(self._ring):
+            grown = np.empty(total, dtype=np.float32)
+            grown[:tail_len] = self._ring[:tail_len]
+            self._ring = grown
 
-        # Combine with pending audio (keep overlap from previous chunk)
-        if len(self.pending_audio) > 0:
-            combined_audio = np.concatenate([
-                self.pending_audio[-overlap_samples:] if len(self.pending_audio) >= overlap_samples else self.pending_audio,
-                new_audio
-            ])
-            # Adjust start time for overlap
-            effective_start_time = chunk_start_time - self.overlap_seconds
-        else:
-            combined_audio = new_audio
-            effective_start_time = chunk_start_time
+        # Combine with the overlap kept from the previous chunk
+        self._ring[tail_len:total] = new_audio
+        combined_audio = self._ring[:total]
+        effective_start_time = chunk_start_time - tail_len / self.sample_rate
 
-        # Store for next chunk's overlap
-        self.pending_audio = new_audio
+        # Transcribe the decoded audio directly (no int16/base64 re-encode)
+        result = self.engine.transcribe_array(combined_audio, language)
 
-        # Encode combined audio
-        audio_int16 = (combined_audio * 32767).astype(np.int16)
-        audio_base64_combined = base64.b64encode(audio_int16.tobytes()).decode('utf-8')
+        # Keep this chunk's tail as the next chunk's overlap
+        keep = min(len(new_audio), self._overlap_samples)
+        self._ring[:keep] = new_audio[len(new_audio) - keep:]
+        self._tail_len = keep
 
-        # Transcribe
-        result = self.engine.transcribe_with_segments(audio_base64_combined, language)
+        return self._adjust_segments(result['segments'], effective_start_time)
 
-        # Adjust segment timestamps to video time
+    def process_batch(self, chunks: list) -> list:
+        """
+        Process several consecutive chunks with one batched transcription.
+
+        Each chunk's overlap is the previous chunk's audio, so all combined
+        inputs are known up front and can share one encoder forward.
+
+        Args:
+            chunks: (audio_base64, chunk_start_time, language) tuples in
+                stream order; all must use the same language
+
+        Returns:
+            One list of adjusted segments per chunk, as from process_chunk()
+        """
+        language = chunks[0][2]
+        combined = []
+        start_times = []
+        tail = self._ring[:self._tail_len].copy()
+        for audio_base64, chunk_start_time, _ in chunks:
+            new_audio = self.engine.decode_audio(audio_base64)
+            combined.append(np.concatenate((tail, new_audio)))
+            start_times.append(chunk_start_time - len(tail) / self.sample_rate)
+            tail = new_audio[max(len(new_audio) - self._overlap_samples, 0):]
+
+        results = self.engine.transcribe_batch(combined, language)
+
+        # Keep the last chunk's tail as the next chunk's overlap
+        if len(tail) > len(self._ring):
+            self._ring = np.empty(len(tail), dtype=np.float32)
+        self._ring[:len(tail)] = tail
+        self._tail_len = len(tail)
+
+        return [
+            self._adjust_segments(result['segments'], start_time)
+            for result, start_time in zip(results, start_times)
+        ]
+
+    def _adjust_segments(self, segments: list, effective_start_time: float) -> list:
+        """Shift segments to video time, dropping ones already returned."""
         adjusted_segments = []
-        for seg in result['segments']:
+        for seg in segments:
             adjusted_start = effective_start_time + seg['start']
             adjusted_end = effective_start_time + seg['end']
 
             # Skip segments that overlap with previously returned segments
-            if adjusted_start >= self.last_end_time:
-                adjusted_segments.append({
-                    'start': adjusted_start,
-                    'end': adjusted_end,
-                    'text': seg['text']
-                })
-                self.last_end_time = adjusted_end
+            if adjusted_start < self.last_end_time:
+                continue
+
+            # Trim words that repeat the end of what was already emitted
+            words = seg['text'].split()
+            normalized = [_normalize_word(w) for w in words]
+            trim = _overlap_length(self._last_words, normalized)
+            self.last_end_time = adjusted_end
+            if trim == len(words):
+                continue
+
+            adjusted_segments.append({
+                'start': adjusted_start,
+                'end': adjusted_end,
+                'text': ' '.join(words[trim:]) if trim else seg['text']
+            })
+            self._last_words.extend(normalized[trim:])
 
         return adjusted_segments
 
     def reset(self):
         """Reset streaming state (e.g., on video seek)."""
-        self.pending_audio = np.array([], dtype=np.float32)
+        self._tail_len = 0
         self.last_end_time = 0.0
+        self._last_words.clear()
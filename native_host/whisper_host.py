@@ -17,21 +17,91 @@ if sys.platform == 'win32':
     msvcrt.setmode(sys.stdin.fileno(), os.O_BINARY)
     msvcrt.setmode(sys.stdout.fileno(), os.O_BINARY)
 
-# Use Python's standard I/O (works on all platforms with binary mode set)
-def _native_read(n):
-    """Read exactly n bytes from stdin."""
-    data = sys.stdin.buffer.read(n)
-    return data if data else b''
+# Use Python's standard I/O (works on all platforms with binary mode set).
+# The handles are captured now because engine loading temporarily swaps
+# sys.stdout for a StringIO, which has no .buffer or usable fileno.
+# stdout is re-wrapped with a buffer sized to the 1MB message limit, so a
+# frame goes out as a single write where writev isn't available.
+import io
+_NATIVE_BUFFER_SIZE = 1024 * 1024 + 8
+sys.stdout.flush()
+_stdout_bin = io.BufferedWriter(
+    io.FileIO(sys.stdout.fileno(), 'wb', closefd=False), buffer_size=_NATIVE_BUFFER_SIZE)
+
+# stdin is read straight from the fd: message sizes are always known from
+# the length prefix, so a buffering layer would only add a memcpy of every
+# body. Bodies land in one reused buffer (Chrome caps host-bound messages
+# at 1MB, as does read_native_message) rather than a fresh bytes object.
+_stdin_fd = sys.stdin.fileno()
+_MAX_MESSAGE_SIZE = 1024 * 1024
+_read_buf = bytearray(_MAX_MESSAGE_SIZE)
+_read_view = memoryview(_read_buf)
+_len_view = memoryview(bytearray(4))
+
+if hasattr(os, 'readv'):
+    def _read_fd_into(view) -> int:
+        """Read from stdin directly into view; returns the byte count (0 at EOF)."""
+        return os.readv(_stdin_fd, [view])
+else:
+    def _read_fd_into(view) -> int:
+        """Read from stdin into view; returns the byte count (0 at EOF)."""
+        data = os.read(_stdin_fd, len(view))
+        view[:len(data)] = data
+        return len(data)
+
+def _native_read_into(n, buf=_read_view):
+    """
+    Read n bytes from stdin into buf (the shared read buffer by default).
+
+    Returns a memoryview of the bytes read (shorter than n at EOF), valid
+    until buf is next read into.
+    """
+    view = buf[:n]
+    got = 0
+    while got < n:
+        chunk = _read_fd_into(view[got:])
+        if not chunk:
+            break
+        got += chunk
+    return view[:got]
 
 def _native_write(data):
     """Write data to stdout."""
     try:
-        written = sys.stdout.buffer.write(data)
-        sys.stdout.buffer.flush()
+        written = _stdout_bin.write(data)
+        _stdout_bin.flush()
         return written == len(data)
     except Exception:
         return False
 
+if hasattr(os, 'writev'):
+    # POSIX: hand the kernel the length prefixes and bodies as separate
+    # iovecs, so frames are never concatenated (a full copy of up to 1MB)
+    # and there is no userspace buffer to flush
+    _stdout_fd = sys.stdout.fileno()
+    _IOV_MAX = max(os.sysconf('SC_IOV_MAX'), 16) if 'SC_IOV_MAX' in os.sysconf_names else 16
+
+    def _native_writev(buffers):
+        """Write a sequence of byte buffers to stdout, in order."""
+        try:
+            buffers = list(buffers)
+            i = 0
+            while i < len(buffers):
+                written = os.writev(_stdout_fd, buffers[i:i + _IOV_MAX])
+                # Skip what went out; resume mid-buffer after a short write
+                while i < len(buffers) and written >= len(buffers[i]):
+                    written -= len(buffers[i])
+                    i += 1
+                if written:
+                    buffers[i] = memoryview(buffers[i])[written:]
+            return True
+        except Exception:
+            return False
+else:
+    def _native_writev(buffers):
+        """Write a sequence of byte buffers to stdout, in order."""
+        return _native_write(b''.join(buffers))
+
 # Set up logging to file for debugging - use absolute path
 _script_dir = os.path.dirname(os.path.abspath(__file__))
 LOG_FILE = os.path.join(_script_dir, 'whisper_host.log')
@@ -39,23 +109,97 @@ LOG_FILE = os.path.join(_script_dir, 'whisper_host.log')
 # Log levels: 0=ERROR, 1=WARN, 2=INFO, 3=DEBUG
 LOG_LEVEL = 2  # Default to INFO
 
-# Lock for thread-safe stdout writes
+import concurrent.futures
 import threading
-_stdout_lock = threading.Lock()
+import queue
+import atexit
+import time
+
+_LOG_PREFIXES = ('ERROR', 'WARN', 'INFO', 'DEBUG')
+
+# Buffered lines are flushed at least this often (ERROR/WARN immediately)
+_LOG_FLUSH_INTERVAL = 1.0
+
+# Log lines are handed to a single writer thread that keeps one buffered
+# file handle open, so log() never touches the file on the caller's thread
+_log_q = queue.Queue()
+
+def _log_writer():
+    """Drain queued (line, level) items into the log file in batches."""
+    try:
+        f = open(LOG_FILE, 'a', encoding='utf-8', buffering=8192)
+    except Exception as e:
+        sys.stderr.write(f"Log error: {e}\n")
+        return
+
+    dirty = False
+    last_flush = time.monotonic()
+    with f:
+        while True:
+            # Block indefinitely when everything is on disk, otherwise wake
+            # up in time for the next flush
+            try:
+                items = [_log_q.get(timeout=_LOG_FLUSH_INTERVAL if dirty else None)]
+            except queue.Empty:
+                items = []
+            while not _log_q.empty():
+                items.append(_log_q.get_nowait())
+
+            stop = False
+            urgent = False
+            try:
+                for item in items:
+                    if item is None:
+                        stop = True
+                        continue
+                    line, level = item
+                    f.write(line)
+                    dirty = True
+                    urgent = urgent or level <= 1
+
+                now = time.monotonic()
+                if dirty and (urgent or stop or now - last_flush >= _LOG_FLUSH_INTERVAL):
+                    f.flush()
+                    dirty = False
+                    last_flush = now
+            except Exception as e:
+                sys.stderr.write(f"Log error: {e}\n")
+            if stop:
+                return
+
+_log_thread = threading.Thread(target=_log_writer, daemon=True)
+_log_thread.start()
+
+def _flush_log():
+    """Stop the writer thread once everything queued so far is written."""
+    _log_q.put(None)
+    _log_thread.join(timeout=2)
+
+atexit.register(_flush_log)
+
+# (second, formatted timestamp) of the last log line; one tuple so threads
+# always see a matching pair
+_log_stamp = (0, '')
 
 def log(message, level=2):
     """Log a message if level <= LOG_LEVEL. Levels: 0=ERROR, 1=WARN, 2=INFO, 3=DEBUG"""
+    global _log_stamp
     if level > LOG_LEVEL:
         return
-    try:
-        with open(LOG_FILE, 'a', encoding='utf-8') as f:
-            import datetime
-            timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            prefix = ['ERROR', 'WARN', 'INFO', 'DEBUG'][level]
-            f.write(f"[{timestamp}] [{prefix}] {message}\n")
-            f.flush()
-    except Exception as e:
-        sys.stderr.write(f"Log error: {e}\n")
+
+    # Lines come in bursts; format the timestamp once per second
+    now = int(time.time())
+    second, timestamp = _log_stamp
+    if now != second:
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))
+        _log_stamp = (now, timestamp)
+    _log_q.put((f"[{timestamp}] [{_LOG_PREFIXES[level]}] {message}\n", level))
+
+def log_traceback():
+    """Log the exception being handled at ERROR level."""
+    # traceback is only needed once something has gone wrong
+    import traceback
+    log(traceback.format_exc(), 0)
 
 log("=== Whisper host starting ===")
 log(f"Python: {sys.executable}", 3)
@@ -65,15 +209,46 @@ log(f"Script dir: {_script_dir}", 3)
 try:
     import struct
     import json
-    import threading
-    import queue
-    import traceback
     from typing import Optional
     log("Standard imports OK", 3)
 except Exception as e:
     log(f"Import error: {e}", 0)
     raise
 
+# Native messaging length prefix (little-endian uint32), compiled once
+_LEN = struct.Struct('<I')
+_pack_len = _LEN.pack
+_unpack_len = _LEN.unpack
+
+# orjson (optional) serializes straight to UTF-8 bytes and parses bytes
+# directly, several times faster than stdlib json on segment lists; ujson
+# is the next-best C codec, stdlib json the last resort on minimal installs
+try:
+    import orjson
+
+    def _json_dumps(obj) -> bytes:
+        # Scores/timestamps may be numpy scalars, which stdlib json accepts
+        # for float64 but orjson only with this option
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    # Parses the read buffer's memoryview without copying it
+    _json_loads = orjson.loads
+except ImportError:
+    try:
+        import ujson
+
+        def _json_dumps(obj) -> bytes:
+            return ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+        def _json_loads(data):
+            return ujson.loads(bytes(data))
+    except ImportError:
+        def _json_dumps(obj) -> bytes:
+            return json.dumps(obj).encode('utf-8')
+
+        def _json_loads(data):
+            return json.loads(str(data, 'utf-8'))
+
 # Import speech engine (lazy load to speed up startup)
 # Supports Whisper, Faster-Whisper, and Parakeet engines
 speech_engine = None
@@ -86,9 +261,25 @@ _latency_mode = 'medium'  # 'low', 'medium', 'high' for streaming latency
 # Pattern detection engine (lazy load)
 pattern_engine = None
 pattern_detector = None
+_PatternDetector = None  # pattern_engine.PatternDetector, bound once the engine loads
+_last_patterns_key = None  # Identity of the pattern list the detector holds
 _pattern_init_thread = None
 _pattern_init_error = None
 
+# Cleared while an engine load is in progress, set once it has finished,
+# successfully or not (callers then check the *_init_error globals).
+# Waiters block on these instead of joining the loader threads.
+_engine_ready = threading.Event()
+_engine_ready.set()
+_pattern_ready = threading.Event()
+_pattern_ready.set()
+
+
+# Pings are the most frequent message and carry nothing but their type;
+# Chrome's JSON.stringify always produces this exact prefix for them
+_PING_PREFIX = b'{"type":"ping"'
+_PING_MSG = {'type': 'ping'}  # Shared, never mutated
+
 
 def read_native_message() -> Optional[dict]:
     """
@@ -97,28 +288,37 @@ def read_native_message() -> Optional[dict]:
     Chrome's native messaging protocol:
     - First 4 bytes: message length (little-endian uint32)
     - Remaining bytes: UTF-8 encoded JSON
+
+    Chrome frames each postMessage() call as exactly one JSON document, so
+    there is no way to append a raw binary audio frame. Audio therefore stays
+    a base64 'audio' string; the engines decode it with a single
+    a2b_base64 call (str or bytes) straight into their sample buffers.
     """
     try:
         # Read message length (4 bytes, little-endian)
-        raw_length = _native_read(4)
+        raw_length = _native_read_into(4, _len_view)
         if not raw_length or len(raw_length) < 4:
             log("Connection closed", 3)
             return None
 
-        message_length = struct.unpack('<I', raw_length)[0]
+        message_length = _unpack_len(raw_length)[0]
 
         # Sanity check message length (max 1MB)
-        if message_length > 1024 * 1024:
+        if message_length > _MAX_MESSAGE_SIZE:
             log(f"Message too large: {message_length}", 1)
             return None
 
         # Read message content
-        message_data = _native_read(message_length)
+        message_data = _native_read_into(message_length)
         if len(message_data) < message_length:
             log(f"Incomplete message data", 1)
             return None
 
-        msg = json.loads(message_data.decode('utf-8'))
+        # Fast path: no JSON parse for pings
+        if message_length >= len(_PING_PREFIX) and _read_buf.startswith(_PING_PREFIX):
+            return _PING_MSG
+
+        msg = _json_loads(message_data)
         msg_type = msg.get('type', 'unknown')
         if msg_type not in ('ping',):  # Don't log pings
             log(f"Received: {msg_type}", 3)
@@ -126,56 +326,161 @@ def read_native_message() -> Optional[dict]:
 
     except Exception as e:
         log(f"read_native_message error: {e}", 0)
-        log(traceback.format_exc(), 0)
+        log_traceback()
         return None
 
 
-def send_native_message(message: dict) -> None:
+class _RawMessage:
+    """
+    A reply serialized ahead of time (framing included), for the small
+    routine replies whose bytes never or barely change. Handlers may return
+    one instead of a dict; send_native_message queues it without encoding.
+    """
+
+    __slots__ = ('type', 'prefix', 'encoded')
+
+    def __init__(self, msg_type: str, encoded: bytes):
+        self.type = msg_type
+        self.encoded = encoded
+        self.prefix = _pack_len(len(encoded))
+
+
+def send_native_message(message) -> None:
     """
     Send a message to Chrome extension via stdout.
 
     Chrome's native messaging protocol:
     - First 4 bytes: message length (little-endian uint32)
     - Remaining bytes: UTF-8 encoded JSON
+
+    Args:
+        message: Message dict, or a pre-serialized _RawMessage
     """
     try:
-        msg_type = message.get('type', 'unknown')
-
-        # Encode to JSON
-        json_str = json.dumps(message)
-        encoded = json_str.encode('utf-8')
+        if isinstance(message, _RawMessage):
+            _out_q.put((message.type, message.prefix, message.encoded))
+            return
 
-        # Create length prefix
-        length_prefix = struct.pack('<I', len(encoded))
-        data = length_prefix + encoded
+        msg_type = message.get('type', 'unknown')
 
-        # Write with lock
-        with _stdout_lock:
-            success = _native_write(data)
+        # Encode to UTF-8 JSON
+        encoded = _json_dumps(message)
 
-        if not success:
-            log(f"Failed to send {msg_type}", 0)
-        elif msg_type not in ('pong', 'heartbeat'):  # Don't log routine messages
-            log(f"Sent: {msg_type}", 3)
+        # Length prefix + body, handed to the writer thread
+        _out_q.put((msg_type, _pack_len(len(encoded)), encoded))
 
     except Exception as e:
         log(f"send_native_message error: {e}", 0)
-        log(traceback.format_exc(), 0)
+        log_traceback()
+
+
+# All stdout writes go through one writer thread, so the main loop and the
+# workers never contend for stdout and the main loop goes straight back to
+# reading once a reply is queued. SimpleQueue's put/get skip the
+# Condition-based locking of queue.Queue.
+_out_q = queue.SimpleQueue()
+
+def _output_writer():
+    """Write queued native messages to stdout in order."""
+    while True:
+        batch = [_out_q.get()]
+        while not _out_q.empty():
+            batch.append(_out_q.get_nowait())
+
+        # Everything already waiting goes out in one writev() (one write()
+        # on Windows)
+        stop = None in batch
+        batch = [item for item in batch if item is not None]
+        if batch:
+            success = _native_writev([buf for _, prefix, encoded in batch for buf in (prefix, encoded)])
+            # Logging is only a queue put, but skip the per-message loop
+            # entirely unless something failed or DEBUG is on
+            if not success:
+                for msg_type, _, _ in batch:
+                    log(f"Failed to send {msg_type}", 0)
+            elif LOG_LEVEL >= 3:
+                for msg_type, _, _ in batch:
+                    if msg_type not in ('pong', 'heartbeat'):  # Don't log routine messages
+                        log(f"Sent: {msg_type}", 3)
+
+        if stop:
+            return
+
+_output_thread = threading.Thread(target=_output_writer, daemon=True)
+_output_thread.start()
+
+def _flush_output():
+    """Stop the writer thread once every queued message has been written."""
+    _out_q.put(None)
+    _output_thread.join(timeout=5)
 
 
 _init_model = None
 _init_device = None
-_init_thread = None
 _init_error = None
 
+# Set by main() once the 'ready' reply to init has been written
+_ready_sent = threading.Event()
+
+# Model loading and every speech-engine call run on this one thread.
+# torch.compile's CUDA graph trees are per thread: the encoder graph is
+# captured during load (_compile_encoder, then _warmup_engine), and any
+# other thread calling the engine would capture, and hold memory for, its
+# own copy. A daemon thread rather than a ThreadPoolExecutor, so exit
+# doesn't wait on a model load or transcription in flight.
+_engine_q = queue.SimpleQueue()
+
+def _engine_worker():
+    """Run submitted engine calls one at a time, in order."""
+    while True:
+        future, fn, args = _engine_q.get()
+        if not future.set_running_or_notify_cancel():
+            continue
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+_engine_thread = threading.Thread(target=_engine_worker, daemon=True, name='engine')
+_engine_thread.start()
+
+def _submit_to_engine(fn, *args) -> concurrent.futures.Future:
+    """Queue fn(*args) on the engine thread."""
+    future = concurrent.futures.Future()
+    _engine_q.put((future, fn, args))
+    return future
+
+def _on_engine_thread(fn, *args):
+    """Run fn(*args) on the engine thread and return its result."""
+    return _submit_to_engine(fn, *args).result()
+
+def _warmup_engine():
+    """
+    Run one throwaway transcription so cuDNN autotuning, kernel JIT and
+    CUDA graph capture happen before the first real chunk.
+
+    Uses 1s of faint noise rather than zeros so the Faster-Whisper silence
+    gate doesn't skip the model; Whisper pads to the same fixed 30s window
+    either way.
+    """
+    import numpy as np
+
+    if _init_device != 'cuda':
+        return
+    try:
+        noise = np.random.default_rng(0).standard_normal(16000).astype(np.float32) * 0.01
+        speech_engine.transcribe_array(noise, 'en')
+        log("Engine warmed up", 3)
+    except Exception as e:
+        log(f"Engine warmup failed: {e}", 1)
+
 def _background_load_engine():
-    """Load speech engine in background thread."""
+    """Load speech engine on the engine thread."""
     global speech_engine, streaming_engine, true_streaming_engine, _init_error, _engine_type, _streaming_mode, _latency_mode
     import io
-    import time
 
-    # Wait a moment to ensure ready message is sent before we touch stdout
-    time.sleep(0.5)
+    # Make sure the ready message is out before we touch stdout
+    _ready_sent.wait(timeout=5.0)
 
     # Redirect stdout to prevent any prints from corrupting native messaging
     old_stdout = sys.stdout
@@ -227,6 +532,8 @@ def _background_load_engine():
                 from streaming_parakeet_engine import FallbackStreamingEngine
                 true_streaming_engine = FallbackStreamingEngine(speech_engine)
 
+        _warmup_engine()
+
         # Restore stdout before logging success
         sys.stdout = old_stdout
         log(f"{_engine_type} loaded successfully (streaming_engine={'available' if true_streaming_engine else 'not loaded'})")
@@ -239,19 +546,23 @@ def _background_load_engine():
         sys.stdout = old_stdout
         _init_error = str(e)
         log(f"{_engine_type} load error: {e}", 0)
-        log(traceback.format_exc(), 0)
+        log_traceback()
+    finally:
+        _engine_ready.set()
 
 def handle_init(message: dict) -> dict:
     """Handle initialization request - start loading speech engine in background."""
-    global _init_model, _init_device, _init_thread, _engine_type, _streaming_mode, _latency_mode
+    global _init_model, _init_device, _engine_type, _streaming_mode, _latency_mode
 
     _engine_type = message.get('engine', 'faster-whisper')  # 'whisper', 'faster-whisper', or 'parakeet'
 
     # Set default model based on engine type
     if _engine_type == 'parakeet':
         _init_model = message.get('model', 'nvidia/parakeet-tdt-0.6b-v3')
+    elif _engine_type == 'faster-whisper':
+        _init_model = message.get('model', 'distil-large-v3')
     else:
-        # Both whisper and faster-whisper use the same model names
+        # openai-whisper has no distilled checkpoints
         _init_model = message.get('model', 'large-v3')
 
     _init_device = message.get('device', 'cuda')
@@ -260,9 +571,9 @@ def handle_init(message: dict) -> dict:
     _streaming_mode = message.get('streamingMode', False)
     _latency_mode = message.get('latencyMode', 'medium')  # 'low', 'medium', 'high'
 
-    # Start loading in background thread
-    _init_thread = threading.Thread(target=_background_load_engine, daemon=True)
-    _init_thread.start()
+    # Start loading on the engine thread
+    _engine_ready.clear()
+    _submit_to_engine(_background_load_engine)
 
     log(f"Init: engine={_engine_type}, model={_init_model}, device={_init_device}, streaming={_streaming_mode}, latency={_latency_mode}", 3)
 
@@ -278,90 +589,186 @@ def handle_init(message: dict) -> dict:
     }
 
 
+# Live-subtitle chunks are capped so a backlog (engine slower than real
+# time) can't grow without limit; past the cap the oldest chunk is dropped
+# since it's the most stale. Subtitle-generation chunks are sent with
+# 'noDrop' and always queued: a lost one is a permanent gap in the
+# generated file.
+_TRANSCRIBE_QUEUE_SIZE = 8
 _transcribe_queue = queue.Queue()
 _transcribe_thread = None
+_reply_thread = None
+
+# Chunks queued while the engine is busy are transcribed together, up to
+# this many per encoder forward
+_TRANSCRIBE_BATCH = 4
+
+# Two stages: the transcription worker batches the queue and runs each
+# batch on the engine thread, and the reply worker formats, encodes and
+# sends the results, overlapping the next batch. The streaming engines
+# carry overlap state between chunks, and both stages are FIFO, so batches
+# run and reply in queue order.
+_reply_q = queue.SimpleQueue()
+_workers_lock = threading.Lock()
+
+def _transcribe_tasks(batch: list) -> list:
+    """Run queued (message, chunk_id) tasks, batching when the engine supports it."""
+    chunks = [
+        (message.get('audio', ''), message.get('timestamp', 0), message.get('language', 'en'))
+        for message, _ in batch
+    ]
+
+    if (len(chunks) > 1 and hasattr(streaming_engine, 'process_batch')
+            and len({language for _, _, language in chunks}) == 1):
+        log(f"Processing {len(chunks)} chunks as one batch", 3)
+        return streaming_engine.process_batch(chunks)
+
+    results = []
+    for (_, chunk_id), chunk in zip(batch, chunks):
+        log(f"Processing chunk {chunk_id}", 3)
+        results.append(streaming_engine.process_chunk(*chunk))
+    return results
+
+def _transcription_replies(batch: list) -> list:
+    """Transcribe a batch (on the engine thread), pairing each task with its result."""
+    if _init_error is not None or streaming_engine is None:
+        if _init_error is not None:
+            error = f'Whisper initialization failed: {_init_error}'
+        else:
+            error = 'Engine not initialized'
+        return [
+            {'type': 'error', 'message': error, 'chunkId': chunk_id}
+            for _, chunk_id in batch
+        ]
 
-def _transcription_worker():
-    """Background worker for transcription."""
-    global streaming_engine, _init_thread, _init_error
+    return list(zip(batch, _transcribe_tasks(batch)))
 
+def _transcription_worker():
+    """Background worker running every batch through the engine, in queue order."""
     while True:
-        try:
-            task = _transcribe_queue.get(timeout=1)
-            if task is None:  # Shutdown signal
+        task = _transcribe_queue.get()
+        if task is None:  # Shutdown signal
+            _reply_q.put(None)
+            break
+
+        # Drain whatever else is already waiting
+        batch = [task]
+        stop = False
+        while len(batch) < _TRANSCRIBE_BATCH:
+            try:
+                task = _transcribe_queue.get_nowait()
+            except queue.Empty:
                 break
+            if task is None:
+                stop = True
+                break
+            batch.append(task)
 
-            message, chunk_id = task
-
-            # Wait for Whisper if still loading
-            if _init_thread is not None and _init_thread.is_alive():
-                log("Waiting for Whisper to load...", 3)
-                _init_thread.join(timeout=60)
-
-            if _init_error is not None:
-                send_native_message({
-                    'type': 'error',
-                    'message': f'Whisper initialization failed: {_init_error}',
-                    'chunkId': chunk_id
-                })
-                continue
-
-            if streaming_engine is None:
-                send_native_message({
-                    'type': 'error',
-                    'message': 'Engine not initialized',
-                    'chunkId': chunk_id
-                })
-                continue
+        # Wait for Whisper if still loading. Not on the engine thread: the
+        # load itself runs there
+        if not _engine_ready.is_set():
+            log("Waiting for Whisper to load...", 3)
+            _engine_ready.wait(timeout=60)
 
-            # Process transcription
-            audio_base64 = message.get('audio', '')
-            timestamp = message.get('timestamp', 0)
-            language = message.get('language', 'en')
+        try:
+            results = _on_engine_thread(_transcription_replies, batch)
+        except Exception as e:
+            log(f"Worker error: {e}", 0)
+            log_traceback()
+            results = []
+        _reply_q.put(results)
 
-            log(f"Processing chunk {chunk_id}", 3)
-            segments = streaming_engine.process_chunk(audio_base64, timestamp, language)
-            full_text = ' '.join(seg['text'] for seg in segments)
+        if stop:
+            _reply_q.put(None)
+            break
 
-            if full_text.strip():
-                log(f"Transcription: {full_text[:80]}")
-            send_native_message({
-                'type': 'transcription',
-                'chunkId': chunk_id,
-                'text': full_text,
-                'segments': segments,
-                'timestamp': timestamp
-            })
+def _reply_worker():
+    """Background worker formatting, encoding and sending transcription results."""
+    while True:
+        results = _reply_q.get()
+        if results is None:
+            break
 
-        except queue.Empty:
-            continue
+        replies = []
+        try:
+            for result in results:
+                if isinstance(result, dict):
+                    replies.append(result)
+                    continue
+
+                (message, chunk_id), segments = result
+                full_text = ' '.join(seg['text'] for seg in segments)
+
+                if full_text.strip():
+                    log(f"Transcription: {full_text[:80]}")
+                replies.append(_RawMessage('transcription', _json_dumps({
+                    'type': 'transcription',
+                    'chunkId': chunk_id,
+                    'text': full_text,
+                    'segments': segments,
+                    'timestamp': message.get('timestamp', 0)
+                })))
         except Exception as e:
             log(f"Worker error: {e}", 0)
-            log(traceback.format_exc(), 0)
-
-def handle_transcribe(message: dict) -> dict:
+            log_traceback()
+
+        for reply in replies:
+            send_native_message(reply)
+
+def _start_transcription_workers():
+    """Start the engine and reply workers if they aren't running."""
+    global _transcribe_thread, _reply_thread
+
+    with _workers_lock:
+        started = False
+        if _transcribe_thread is None or not _transcribe_thread.is_alive():
+            _transcribe_thread = threading.Thread(target=_transcription_worker, daemon=True)
+            _transcribe_thread.start()
+            started = True
+        if _reply_thread is None or not _reply_thread.is_alive():
+            _reply_thread = threading.Thread(target=_reply_worker, daemon=True)
+            _reply_thread.start()
+            started = True
+    if started:
+        log("Transcription workers started", 3)
+
+# Acks differ only in chunkId, which is JSON-encoded on its own and spliced in
+_TRANSCRIBE_ACK_TMPL = b'{"type":"transcribe_ack","chunkId":%s,"status":"queued"}'
+_STREAM_CHUNK_ACK_TMPL = b'{"type":"stream_chunk_ack","chunkId":%s,"status":"queued"}'
+
+def handle_transcribe(message: dict) -> _RawMessage:
     """Handle transcription request - queue for background processing."""
-    global _transcribe_thread
-
-    # Start worker thread if not running
-    if _transcribe_thread is None or not _transcribe_thread.is_alive():
-        _transcribe_thread = threading.Thread(target=_transcription_worker, daemon=True)
-        _transcribe_thread.start()
-        log("Transcription worker started", 3)
+    # Start worker threads if not running
+    _start_transcription_workers()
 
     chunk_id = message.get('chunkId', '')
-    _transcribe_queue.put((message, chunk_id))
+    dropped = None
+    if not message.get('noDrop'):
+        # Drop the oldest queued chunk to make room, unless it's one that
+        # must be kept. Peeked under the queue's own lock so the worker
+        # can't take it in between; the queue is unbounded, so nobody
+        # waits on a free slot
+        with _transcribe_queue.mutex:
+            backlog = _transcribe_queue.queue
+            if len(backlog) >= _TRANSCRIBE_QUEUE_SIZE and not backlog[0][0].get('noDrop'):
+                dropped = backlog.popleft()
+    if dropped is not None:
+        _, dropped_id = dropped
+        log(f"Transcription backlog full, dropped {dropped_id}", 1)
+        send_native_message({
+            'type': 'dropped',
+            'chunkId': dropped_id
+        })
+    _transcribe_queue.put_nowait((message, chunk_id))
     log(f"Queued: {chunk_id}", 3)
 
     # Send acknowledgment to keep connection alive
-    return {
-        'type': 'transcribe_ack',
-        'chunkId': chunk_id,
-        'status': 'queued'
-    }
+    return _RawMessage('transcribe_ack', _TRANSCRIBE_ACK_TMPL % _json_dumps(chunk_id))
+
 
+_RESET_COMPLETE = _RawMessage('reset_complete', b'{"type":"reset_complete"}')
 
-def handle_reset(message: dict) -> dict:
+def handle_reset(message: dict) -> _RawMessage:
     """Handle reset request (e.g., on video seek)."""
     global streaming_engine, true_streaming_engine
 
@@ -371,9 +778,7 @@ def handle_reset(message: dict) -> dict:
     if true_streaming_engine:
         true_streaming_engine.reset_cache()
 
-    return {
-        'type': 'reset_complete'
-    }
+    return _RESET_COMPLETE
 
 
 # ============================================================================
@@ -387,20 +792,20 @@ _streaming_sequence = 0
 
 def _streaming_worker():
     """Background worker for streaming transcription with low latency."""
-    global true_streaming_engine, _init_thread, _init_error, _streaming_sequence
+    global true_streaming_engine, _init_error, _streaming_sequence
 
     while True:
         try:
-            task = _streaming_queue.get(timeout=1)
+            task = _streaming_queue.get()
             if task is None:  # Shutdown signal
                 break
 
             message, chunk_id = task
 
             # Wait for engine if still loading
-            if _init_thread is not None and _init_thread.is_alive():
+            if not _engine_ready.is_set():
                 log("Waiting for streaming engine to load...", 3)
-                _init_thread.join(timeout=60)
+                _engine_ready.wait(timeout=60)
 
             if _init_error is not None:
                 send_native_message({
@@ -427,7 +832,8 @@ def _streaming_worker():
 
             log(f"Processing streaming chunk {chunk_id} at {timestamp:.1f}s", 3)
 
-            result = true_streaming_engine.process_streaming_chunk(
+            result = _on_engine_thread(
+                true_streaming_engine.process_streaming_chunk,
                 audio_base64,
                 timestamp,
                 sequence_id
@@ -456,14 +862,12 @@ def _streaming_worker():
                     'sequenceId': sequence_id
                 })
 
-        except queue.Empty:
-            continue
         except Exception as e:
             log(f"Streaming worker error: {e}", 0)
-            log(traceback.format_exc(), 0)
+            log_traceback()
 
 
-def handle_stream_chunk(message: dict) -> dict:
+def handle_stream_chunk(message: dict) -> _RawMessage:
     """Handle streaming audio chunk - queue for low-latency processing."""
     global _streaming_thread
 
@@ -478,11 +882,7 @@ def handle_stream_chunk(message: dict) -> dict:
     log(f"Streaming queued: {chunk_id}", 3)
 
     # Send acknowledgment
-    return {
-        'type': 'stream_chunk_ack',
-        'chunkId': chunk_id,
-        'status': 'queued'
-    }
+    return _RawMessage('stream_chunk_ack', _STREAM_CHUNK_ACK_TMPL % _json_dumps(chunk_id))
 
 
 def handle_reset_streaming(message: dict) -> dict:
@@ -504,9 +904,10 @@ def handle_finalize_streaming(message: dict) -> dict:
     """Finalize streaming session and get any remaining output."""
     global true_streaming_engine
 
-    if true_streaming_engine:
+    # Load runs on the engine thread, so don't block the main loop behind it
+    if true_streaming_engine and _engine_ready.is_set():
         timestamp = message.get('timestamp', 0)
-        result = true_streaming_engine.finalize_stream(timestamp)
+        result = _on_engine_thread(true_streaming_engine.finalize_stream, timestamp)
 
         if result.get('final_text'):
             return {
@@ -522,12 +923,12 @@ def handle_finalize_streaming(message: dict) -> dict:
     }
 
 
-def handle_ping(message: dict) -> dict:
+_PONG_UNINIT = _RawMessage('pong', b'{"type":"pong","initialized":false}')
+_PONG_INIT = _RawMessage('pong', b'{"type":"pong","initialized":true}')
+
+def handle_ping(message: dict) -> _RawMessage:
     """Handle ping request for health check."""
-    return {
-        'type': 'pong',
-        'initialized': speech_engine is not None
-    }
+    return _PONG_INIT if speech_engine is not None else _PONG_UNINIT
 
 
 # ============================================================================
@@ -536,12 +937,8 @@ def handle_ping(message: dict) -> dict:
 
 def _background_load_pattern_engine():
     """Load pattern engine in background thread."""
-    global pattern_engine, _pattern_init_error
+    global pattern_engine, _PatternDetector, _pattern_init_error
     import io
-    import time
-
-    # Wait a moment
-    time.sleep(0.3)
 
     old_stdout = sys.stdout
     captured_output = io.StringIO()
@@ -550,7 +947,8 @@ def _background_load_pattern_engine():
         log("Loading pattern detection engine...")
         sys.stdout = captured_output
 
-        from pattern_engine import PatternEngine
+        from pattern_engine import PatternEngine, PatternDetector
+        _PatternDetector = PatternDetector
         pattern_engine = PatternEngine(device='cuda')
 
         sys.stdout = old_stdout
@@ -560,7 +958,9 @@ def _background_load_pattern_engine():
         sys.stdout = old_stdout
         _pattern_init_error = str(e)
         log(f"Pattern engine load error: {e}", 0)
-        log(traceback.format_exc(), 0)
+        log_traceback()
+    finally:
+        _pattern_ready.set()
 
 
 def handle_init_patterns(message: dict) -> dict:
@@ -571,6 +971,7 @@ def handle_init_patterns(message: dict) -> dict:
 
     # Start loading engine in background if not loaded
     if pattern_engine is None and _pattern_init_thread is None:
+        _pattern_ready.clear()
         _pattern_init_thread = threading.Thread(target=_background_load_pattern_engine, daemon=True)
         _pattern_init_thread.start()
 
@@ -585,12 +986,12 @@ def handle_init_patterns(message: dict) -> dict:
 
 def handle_learn_pattern(message: dict) -> dict:
     """Learn a new audio pattern from provided audio segment."""
-    global pattern_engine, _pattern_init_thread, _pattern_init_error
+    global pattern_engine, _pattern_init_error
 
     # Wait for engine if still loading
-    if _pattern_init_thread is not None and _pattern_init_thread.is_alive():
+    if not _pattern_ready.is_set():
         log("Waiting for pattern engine to load...", 3)
-        _pattern_init_thread.join(timeout=60)
+        _pattern_ready.wait(timeout=60)
 
     if _pattern_init_error is not None:
         return {
@@ -612,7 +1013,6 @@ def handle_learn_pattern(message: dict) -> dict:
         audio = pattern_engine.decode_audio(audio_base64)
         duration = len(audio) / 16000.0  # 16kHz sample rate
 
-        import time
         pattern_id = f"pattern_{int(time.time() * 1000)}"
 
         result = {
@@ -623,9 +1023,21 @@ def handle_learn_pattern(message: dict) -> dict:
             'duration': duration
         }
 
-        # Generate fingerprint for exact matching
+        # Fingerprint (CPU, Chromaprint) and embedding (PANNs forward) are
+        # independent and both release the GIL, so run them side by side;
+        # the embedding is always generated as the fallback
+        if pattern_type == 'exact':
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+                fp_future = executor.submit(pattern_engine.fingerprint, audio)
+                emb_future = executor.submit(pattern_engine.embed, audio)
+                fingerprint = fp_future.result()
+                embedding = emb_future.result()
+        else:
+            fingerprint = None
+            embedding = pattern_engine.embed(audio)
+
+        # Fingerprint for exact matching
         if pattern_type == 'exact':
-            fingerprint = pattern_engine.fingerprint(audio)
             if fingerprint:
                 result['fingerprint'] = fingerprint
                 log(f"Generated fingerprint with {len(fingerprint)} frames")
@@ -634,11 +1046,10 @@ def handle_learn_pattern(message: dict) -> dict:
                 pattern_type = 'semantic'
                 result['patternType'] = 'semantic'
 
-        # Generate embedding for semantic matching (always include for fallback)
-        embedding = pattern_engine.embed(audio)
+        # Embedding for semantic matching (always include for fallback)
         if embedding is not None:
-            result['embedding'] = pattern_engine.quantize_embedding(embedding)
-            log(f"Generated embedding with {len(result['embedding'])} dimensions")
+            result['embedding'], result['embeddingScale'] = pattern_engine.quantize_embedding(embedding)
+            log(f"Generated embedding with {len(embedding)} dimensions")
         else:
             if pattern_type == 'semantic':
                 return {
@@ -651,7 +1062,7 @@ def handle_learn_pattern(message: dict) -> dict:
 
     except Exception as e:
         log(f"Learn pattern error: {e}", 0)
-        log(traceback.format_exc(), 0)
+        log_traceback()
         return {
             'type': 'error',
             'message': f'Failed to learn pattern: {str(e)}'
@@ -660,11 +1071,10 @@ def handle_learn_pattern(message: dict) -> dict:
 
 def handle_detect(message: dict) -> dict:
     """Run pattern detection on audio chunk."""
-    global pattern_engine, pattern_detector, _pattern_init_thread, _pattern_init_error
+    global pattern_engine, pattern_detector, _pattern_init_error, _last_patterns_key
 
     # Wait for engine if still loading
-    if _pattern_init_thread is not None and _pattern_init_thread.is_alive():
-        _pattern_init_thread.join(timeout=60)
+    _pattern_ready.wait(timeout=60)
 
     if _pattern_init_error is not None or pattern_engine is None:
         return {
@@ -678,12 +1088,20 @@ def handle_detect(message: dict) -> dict:
         timestamp = message.get('timestamp', 0)
         patterns = message.get('patterns', [])
 
+        # The extension resends the full list with every chunk; only rebuild
+        # the detector's reference arrays (which also clears its
+        # consecutive-match state) when a pattern was added, removed or edited
+        patterns_key = tuple(
+            (p.get('id'), p.get('type'), p.get('threshold'), p.get('embeddingScale'))
+            for p in patterns
+        )
+
         # Create detector if needed or update patterns
-        from pattern_engine import PatternDetector
         if pattern_detector is None:
-            pattern_detector = PatternDetector(pattern_engine, patterns)
-        else:
+            pattern_detector = _PatternDetector(pattern_engine, patterns)
+        elif patterns_key != _last_patterns_key:
             pattern_detector.set_patterns(patterns)
+        _last_patterns_key = patterns_key
 
         # Process chunk and get detections
         detections = pattern_detector.process_chunk(audio_base64, timestamp)
@@ -703,7 +1121,7 @@ def handle_detect(message: dict) -> dict:
 
     except Exception as e:
         log(f"Detection error: {e}", 0)
-        log(traceback.format_exc(), 0)
+        log_traceback()
         return {
             'type': 'detections',
             'detections': [],
@@ -711,47 +1129,53 @@ def handle_detect(message: dict) -> dict:
         }
 
 
-def handle_reset_patterns(message: dict) -> dict:
+_PATTERNS_RESET = _RawMessage('patterns_reset', b'{"type":"patterns_reset"}')
+
+def handle_reset_patterns(message: dict) -> _RawMessage:
     """Reset pattern detection state (e.g., on video seek)."""
     global pattern_detector
 
     if pattern_detector:
         pattern_detector.reset()
 
-    return {
-        'type': 'patterns_reset'
-    }
+    return _PATTERNS_RESET
+
+
+def _handle_shutdown(message: dict) -> dict:
+    """Handle shutdown request."""
+    return {'_shutdown': True}  # Special marker for shutdown
 
 
-def handle_message(message: dict) -> Optional[dict]:
+# Message type -> handler, built once
+_HANDLERS = {
+    'init': handle_init,
+    'transcribe': handle_transcribe,
+    'reset': handle_reset,
+    'ping': handle_ping,
+    'shutdown': _handle_shutdown,
+    # Streaming transcription handlers
+    'stream_chunk': handle_stream_chunk,
+    'reset_streaming': handle_reset_streaming,
+    'finalize_streaming': handle_finalize_streaming,
+    # Pattern detection handlers
+    'init_patterns': handle_init_patterns,
+    'learn_pattern': handle_learn_pattern,
+    'detect': handle_detect,
+    'reset_patterns': handle_reset_patterns
+}
+
+
+def handle_message(message: dict):
     """Route message to appropriate handler."""
     msg_type = message.get('type', '')
 
-    handlers = {
-        'init': handle_init,
-        'transcribe': handle_transcribe,
-        'reset': handle_reset,
-        'ping': handle_ping,
-        'shutdown': lambda m: {'_shutdown': True},  # Special marker for shutdown
-        # Streaming transcription handlers
-        'stream_chunk': handle_stream_chunk,
-        'reset_streaming': handle_reset_streaming,
-        'finalize_streaming': handle_finalize_streaming,
-        # Pattern detection handlers
-        'init_patterns': handle_init_patterns,
-        'learn_pattern': handle_learn_pattern,
-        'detect': handle_detect,
-        'reset_patterns': handle_reset_patterns
-    }
-
-    handler = handlers.get(msg_type)
+    handler = _HANDLERS.get(msg_type)
     if handler:
         return handler(message)
-    else:
-        return {
-            'type': 'error',
-            'message': f'Unknown message type: {msg_type}'
-        }
+    return {
+        'type': 'error',
+        'message': f'Unknown message type: {msg_type}'
+    }
 
 
 _heartbeat_stop = threading.Event()
@@ -790,12 +1214,17 @@ def main():
             if response is None:
                 # No immediate response needed (async processing)
                 pass
+            elif isinstance(response, _RawMessage):
+                # Pre-serialized routine reply
+                send_native_message(response)
             elif response.get('_shutdown'):
                 # Shutdown requested
                 running = False
             else:
                 # Send response
                 send_native_message(response)
+                if response.get('type') == 'ready':
+                    _ready_sent.set()
 
         except Exception as e:
             # Send error response
@@ -807,6 +1236,9 @@ def main():
     # Stop heartbeat
     _heartbeat_stop.set()
 
+    # Let queued replies reach Chrome before exiting
+    _flush_output()
+
 
 if __name__ == '__main__':
     try:
@@ -814,5 +1246,5 @@ if __name__ == '__main__':
         log("Host shutdown", 3)
     except Exception as e:
         log(f"Fatal error: {e}", 0)
-        log(traceback.format_exc(), 0)
+        log_traceback()
         raise
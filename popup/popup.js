@@ -1313,6 +1313,7 @@ document.addEventListener('DOMContentLoaded', async () => {
           duration: learnResponse.duration,
           fingerprint: learnResponse.fingerprint,
           embedding: learnResponse.embedding,
+          embeddingScale: learnResponse.embeddingScale,
           threshold: 0.85,
           createdAt: Date.now()
         };